@@ -1,44 +1,72 @@
 """
 Endpoints de cuentas
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import TypeAdapter
+from sqlalchemy import exists, func, select, update
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, closing_session
 from app.models.user import User
 from app.models.account import Account
 from app.schemas.account import AccountCreate, AccountUpdate, AccountResponse
 from app.utils.security import get_current_active_user
+from app.utils import cache
+from app.utils.etag import conditional_json_response, get_or_set_json_with_etag
 from app.services.transaction_service import TransactionService
 
 router = APIRouter()
 
+_ACCOUNT_LIST = TypeAdapter(List[AccountResponse])
+
 
 @router.get("", response_model=List[AccountResponse])
 def get_accounts(
+    request: Request,
     include_archived: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener cuentas del usuario"""
-    query = db.query(Account).filter(Account.user_id == current_user.id)
-    
-    if not include_archived:
-        query = query.filter(Account.is_archived == False)
-    
-    accounts = query.order_by(Account.display_order, Account.name).all()
-    
-    # Agregar balance calculado
-    result = []
-    for account in accounts:
-        account_dict = AccountResponse.from_orm(account).dict()
-        account_dict["current_balance"] = TransactionService.get_account_balance(
-            db, current_user.id, account.id
+    def load_accounts():
+        # Proyectar solo las columnas de AccountResponse, sin instanciar objetos ORM
+        query = select(
+            Account.id,
+            Account.user_id,
+            Account.name,
+            Account.type,
+            Account.initial_balance,
+            Account.currency,
+            Account.color,
+            Account.icon,
+            Account.is_default,
+            Account.is_archived,
+            Account.exclude_from_totals,
+            Account.display_order,
+            Account.created_at,
+        ).where(Account.user_id == current_user.id)
+        
+        if not include_archived:
+            query = query.where(Account.is_archived == False)
+        
+        rows = db.execute(query.order_by(Account.display_order, Account.name)).mappings().all()
+        
+        # Agregar balance calculado (una sola consulta agregada para todas las cuentas)
+        balances = TransactionService.get_balances_for_user(db, current_user.id)
+        
+        # Validar la lista completa de una vez con el validador precompilado
+        return _ACCOUNT_LIST.dump_python(_ACCOUNT_LIST.validate_python([
+            {**row, "current_balance": balances.get(row["id"], row["initial_balance"])}
+            for row in rows
+        ]), mode="json")
+    
+    with closing_session(db):
+        body, etag = get_or_set_json_with_etag(
+            current_user.id, ("accounts", include_archived), load_accounts,
+            ttl=cache.REFERENCE_TTL
         )
-        result.append(account_dict)
-    
-    return result
+    return conditional_json_response(request, body, etag)
 
 
 @router.post("", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
@@ -50,10 +78,12 @@ def create_account(
     """Crear nueva cuenta"""
     # Si es cuenta por defecto, desmarcar otras
     if account_data.is_default:
-        db.query(Account).filter(
-            Account.user_id == current_user.id,
-            Account.is_default == True
-        ).update({"is_default": False})
+        db.execute(
+            update(Account).where(
+                Account.user_id == current_user.id,
+                Account.is_default == True
+            ).values(is_default=False).execution_options(synchronize_session=False)
+        )
     
     account = Account(
         user_id=current_user.id,
@@ -83,10 +113,10 @@ def get_account(
     db: Session = Depends(get_db)
 ):
     """Obtener cuenta específica"""
-    account = db.query(Account).filter(
+    account = db.scalars(select(Account).where(
         Account.id == account_id,
         Account.user_id == current_user.id
-    ).first()
+    )).first()
     
     if not account:
         raise HTTPException(status_code=404, detail="Cuenta no encontrada")
@@ -107,23 +137,26 @@ def update_account(
     db: Session = Depends(get_db)
 ):
     """Actualizar cuenta"""
-    account = db.query(Account).filter(
+    account = db.scalars(select(Account).where(
         Account.id == account_id,
         Account.user_id == current_user.id
-    ).first()
+    )).first()
     
     if not account:
         raise HTTPException(status_code=404, detail="Cuenta no encontrada")
     
     update_data = account_update.dict(exclude_unset=True)
     
-    # Si marca como default, desmarcar otras
-    if update_data.get("is_default"):
-        db.query(Account).filter(
-            Account.user_id == current_user.id,
-            Account.id != account_id,
-            Account.is_default == True
-        ).update({"is_default": False})
+    # Si marca como default, desmarcar otras (el índice único parcial
+    # uq_accounts_user_default exige hacerlo antes de marcar esta)
+    if update_data.get("is_default") and not account.is_default:
+        db.execute(
+            update(Account).where(
+                Account.user_id == current_user.id,
+                Account.id != account_id,
+                Account.is_default == True
+            ).values(is_default=False).execution_options(synchronize_session=False)
+        )
     
     for field, value in update_data.items():
         setattr(account, field, value)
@@ -148,21 +181,32 @@ def delete_account(
     """Eliminar cuenta (solo si no tiene transacciones)"""
     from app.models.transaction import Transaction
     
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.user_id == current_user.id
+    # Obtener la cuenta y si tiene transacciones en una sola consulta
+    # (EXISTS se detiene en la primera transacción encontrada)
+    has_transactions = exists().where(
+        Transaction.account_id == Account.id,
+        Transaction.user_id == current_user.id
+    )
+    row = db.execute(
+        select(Account, has_transactions).where(
+            Account.id == account_id,
+            Account.user_id == current_user.id
+        )
     ).first()
     
-    if not account:
+    if not row:
         raise HTTPException(status_code=404, detail="Cuenta no encontrada")
     
-    # Verificar si tiene transacciones
-    transaction_count = db.query(Transaction).filter(
-        Transaction.account_id == account_id,
-        Transaction.user_id == current_user.id
-    ).count()
+    account, has_transactions = row
     
-    if transaction_count > 0:
+    if has_transactions:
+        # Contar solo para el mensaje de error
+        transaction_count = db.scalar(
+            select(func.count(Transaction.id)).where(
+                Transaction.account_id == account_id,
+                Transaction.user_id == current_user.id
+            )
+        )
         raise HTTPException(
             status_code=400,
             detail=f"No se puede eliminar la cuenta porque tiene {transaction_count} transacción(es) asociada(s). Elimina primero las transacciones."
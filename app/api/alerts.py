@@ -2,9 +2,10 @@
 Endpoints de alertas y notificaciones
 """
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import datetime
 
 from app.database import get_db
@@ -12,6 +13,7 @@ from app.models.user import User
 from app.models.alert import AlertType, AlertPriority
 from app.utils.security import get_current_active_user
 from app.services.alert_service import AlertService
+from app.utils import cache
 
 router = APIRouter()
 
@@ -33,8 +35,7 @@ class AlertResponse(BaseModel):
     created_at: datetime
     read_at: datetime = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AlertCreate(BaseModel):
@@ -49,6 +50,9 @@ class AlertCreate(BaseModel):
     related_credit_card_id: int = None
 
 
+_ALERT_LIST = TypeAdapter(List[AlertResponse])
+
+
 @router.get("", response_model=List[AlertResponse])
 def get_alerts(
     unread_only: bool = False,
@@ -57,12 +61,16 @@ def get_alerts(
     db: Session = Depends(get_db)
 ):
     """Obtener alertas del usuario"""
-    return AlertService.get_user_alerts(
+    alerts = AlertService.get_user_alerts(
         db=db,
         user_id=current_user.id,
         unread_only=unread_only,
         limit=limit
     )
+    # Validar y serializar con el validador precompilado, sin pasar otra vez por response_model
+    return ORJSONResponse(_ALERT_LIST.dump_python(
+        _ALERT_LIST.validate_python(alerts, from_attributes=True), mode="json"
+    ))
 
 
 @router.get("/unread-count")
@@ -71,13 +79,13 @@ def get_unread_count(
     db: Session = Depends(get_db)
 ):
     """Obtener conteo de alertas no leídas"""
-    alerts = AlertService.get_user_alerts(
-        db=db,
-        user_id=current_user.id,
-        unread_only=True,
-        limit=1000
+    # El conteo se invalida al crear o marcar alertas (ver app.utils.cache)
+    count = cache.get_or_set(
+        current_user.id, "alerts-unread-count",
+        lambda: AlertService.count_unread(db, current_user.id),
+        ttl=cache.LONG_TTL
     )
-    return {"count": len(alerts)}
+    return {"count": count}
 
 
 @router.put("/{alert_id}/read", response_model=AlertResponse)
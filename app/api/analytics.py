@@ -2,13 +2,15 @@
 Endpoints de análisis y reportes
 """
 from fastapi import APIRouter, Depends, Query, Path
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from datetime import date
 
-from app.database import get_db
+from app.database import get_db_read
 from app.models.user import User
 from app.utils.security import get_current_active_user
 from app.services.analytics_service import AnalyticsService
+from app.utils import cache
 
 router = APIRouter()
 
@@ -16,10 +18,14 @@ router = APIRouter()
 @router.get("/dashboard")
 def get_dashboard(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Obtener resumen para dashboard"""
-    return AnalyticsService.get_dashboard_summary(db, current_user.id)
+    return cache.get_or_set(
+        current_user.id, ("dashboard", date.today()),
+        lambda: jsonable_encoder(AnalyticsService.get_dashboard_summary(db, current_user.id)),
+        ttl=cache.SHORT_TTL
+    )
 
 
 @router.get("/expenses-by-category")
@@ -27,7 +33,7 @@ def get_expenses_by_category(
     start_date: date = Query(...),
     end_date: date = Query(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Obtener gastos por categoría"""
     return AnalyticsService.get_expense_by_category(
@@ -39,10 +45,14 @@ def get_expenses_by_category(
 def get_monthly_trend(
     months: int = Query(6, ge=1, le=24),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Obtener tendencia mensual"""
-    return AnalyticsService.get_monthly_trend(db, current_user.id, months)
+    return cache.get_or_set(
+        current_user.id, ("monthly-trend", date.today(), months),
+        lambda: jsonable_encoder(AnalyticsService.get_monthly_trend(db, current_user.id, months)),
+        ttl=cache.LONG_TTL
+    )
 
 
 @router.get("/small-expenses")
@@ -50,7 +60,7 @@ def detect_small_expenses(
     threshold: float = Query(100, gt=0),
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Detectar gastos hormiga"""
     return AnalyticsService.detect_small_expenses(
@@ -61,10 +71,14 @@ def detect_small_expenses(
 @router.get("/net-worth")
 def get_net_worth(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Obtener valor neto"""
-    return AnalyticsService.get_net_worth(db, current_user.id)
+    return cache.get_or_set(
+        current_user.id, "net-worth",
+        lambda: jsonable_encoder(AnalyticsService.get_net_worth(db, current_user.id)),
+        ttl=cache.SHORT_TTL
+    )
 
 
 @router.get("/monthly-report/{year}/{month}")
@@ -72,7 +86,11 @@ def get_monthly_report(
     year: int = Path(..., ge=2000, le=2100),
     month: int = Path(..., ge=1, le=12),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Obtener reporte mensual completo"""
-    return AnalyticsService.get_monthly_report(db, current_user.id, year, month)
\ No newline at end of file
+    return cache.get_or_set(
+        current_user.id, ("monthly-report", date.today(), year, month),
+        lambda: jsonable_encoder(AnalyticsService.get_monthly_report(db, current_user.id, year, month)),
+        ttl=cache.LONG_TTL
+    )
\ No newline at end of file
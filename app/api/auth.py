@@ -3,7 +3,6 @@ Endpoints de autenticación
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import timedelta
 
 from app.database import get_db
 from app.models.user import User
@@ -12,7 +11,7 @@ from app.utils.security import (
     verify_password, get_password_hash, create_access_token,
     get_current_user, get_current_active_user
 )
-from app.config import settings
+from app.config import ACCESS_TOKEN_EXPIRE_DELTA
 
 router = APIRouter()
 
@@ -50,7 +49,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Crear token
     access_token = create_access_token(
         data={"sub": str(user.id)},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expires_delta=ACCESS_TOKEN_EXPIRE_DELTA
     )
     
     return Token(
@@ -81,7 +80,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     # Crear token
     access_token = create_access_token(
         data={"sub": str(user.id)},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expires_delta=ACCESS_TOKEN_EXPIRE_DELTA
     )
     
     return Token(
@@ -97,7 +96,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 
 
 @router.put("/me", response_model=UserResponse)
-async def update_user_profile(
+def update_user_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
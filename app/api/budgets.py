@@ -2,10 +2,11 @@
 Endpoints de presupuestos
 """
 from fastapi import APIRouter, Depends, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, closing_session
 from app.models.user import User
 from app.models.budget import Budget
 from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse
@@ -21,19 +22,9 @@ def get_budgets(
     db: Session = Depends(get_db)
 ):
     """Obtener presupuestos con cálculos"""
-    budgets = db.query(Budget).filter(
-        Budget.user_id == current_user.id,
-        Budget.is_active == True
-    ).all()
-    
-    result = []
-    for budget in budgets:
-        budget_info = BudgetService.get_budget_with_calculations(
-            db, current_user.id, budget.id
-        )
-        result.append(budget_info)
-    
-    return result
+    with closing_session(db):
+        budgets = BudgetService.get_budgets_with_calculations(db, current_user.id)
+    return budgets
 
 
 @router.post("", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
@@ -67,10 +58,10 @@ def update_budget(
     db: Session = Depends(get_db)
 ):
     """Actualizar presupuesto"""
-    budget = db.query(Budget).filter(
+    budget = db.scalars(select(Budget).where(
         Budget.id == budget_id,
         Budget.user_id == current_user.id
-    ).first()
+    )).first()
     
     if not budget:
         from fastapi import HTTPException
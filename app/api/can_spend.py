@@ -69,16 +69,14 @@ def get_available_balance(
     
     Saldo Disponible = Saldo Líquido - Obligaciones Próximas - Dinero en Metas
     """
-    result = CanSpendService.analyze_spending(
-        db=db,
-        user_id=current_user.id,
-        amount=0
-    )
+    state = CanSpendService.get_spending_state(db, current_user.id)
     
     return {
-        "total_liquid": result["total_liquid"],
-        "upcoming_obligations": result["upcoming_obligations"],
-        "money_in_goals": result["money_in_goals"],
-        "available_to_spend": result["current_available"]
+        "total_liquid": state["total_liquid"],
+        "upcoming_obligations": state["upcoming_obligations"],
+        "money_in_goals": state["money_in_goals"],
+        "available_to_spend": (
+            state["total_liquid"] - state["upcoming_obligations"] - state["money_in_goals"]
+        )
     }
 
@@ -1,72 +1,96 @@
 """
 Endpoints de categorías
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session, noload, raiseload
 from typing import List
+from collections import defaultdict
 
-from app.database import get_db
+from app.database import bulk_insert, get_db, closing_session
 from app.models.user import User
 from app.models.category import Category, CategoryType
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.utils.security import get_current_active_user
+from app.utils import cache
+from app.utils.etag import conditional_json_response, get_or_set_json_with_etag
 
 router = APIRouter()
 
+_CATEGORY_LIST = TypeAdapter(List[CategoryResponse])
+
+
+# Categorías predeterminadas de un usuario nuevo (se construyen una sola vez)
+_DEFAULT_CATEGORIES = (
+    # Gastos
+    {"name": "Alimentación", "type": CategoryType.EXPENSE, "icon": "restaurant", "color": "#FF5722"},
+    {"name": "Transporte", "type": CategoryType.EXPENSE, "icon": "directions_car", "color": "#2196F3"},
+    {"name": "Hogar", "type": CategoryType.EXPENSE, "icon": "home", "color": "#4CAF50"},
+    {"name": "Entretenimiento", "type": CategoryType.EXPENSE, "icon": "movie", "color": "#9C27B0"},
+    {"name": "Salud", "type": CategoryType.EXPENSE, "icon": "local_hospital", "color": "#F44336"},
+    {"name": "Educación", "type": CategoryType.EXPENSE, "icon": "school", "color": "#FF9800"},
+    {"name": "Ropa", "type": CategoryType.EXPENSE, "icon": "shopping_bag", "color": "#E91E63"},
+    {"name": "Tecnología", "type": CategoryType.EXPENSE, "icon": "devices", "color": "#00BCD4"},
+    {"name": "Finanzas", "type": CategoryType.EXPENSE, "icon": "account_balance", "color": "#607D8B"},
+    {"name": "Regalos", "type": CategoryType.EXPENSE, "icon": "card_giftcard", "color": "#FFC107"},
+    {"name": "Otros Gastos", "type": CategoryType.EXPENSE, "icon": "more_horiz", "color": "#9E9E9E"},
+    # Ingresos
+    {"name": "Salario", "type": CategoryType.INCOME, "icon": "work", "color": "#4CAF50"},
+    {"name": "Freelance", "type": CategoryType.INCOME, "icon": "business_center", "color": "#8BC34A"},
+    {"name": "Inversiones", "type": CategoryType.INCOME, "icon": "trending_up", "color": "#CDDC39"},
+    {"name": "Otros Ingresos", "type": CategoryType.INCOME, "icon": "attach_money", "color": "#9E9E9E"},
+)
+
 
 def create_default_categories(db: Session, user_id: int):
     """Crear categorías predeterminadas para nuevo usuario"""
-    default_categories = [
-        # Gastos
-        {"name": "Alimentación", "type": CategoryType.EXPENSE, "icon": "restaurant", "color": "#FF5722"},
-        {"name": "Transporte", "type": CategoryType.EXPENSE, "icon": "directions_car", "color": "#2196F3"},
-        {"name": "Hogar", "type": CategoryType.EXPENSE, "icon": "home", "color": "#4CAF50"},
-        {"name": "Entretenimiento", "type": CategoryType.EXPENSE, "icon": "movie", "color": "#9C27B0"},
-        {"name": "Salud", "type": CategoryType.EXPENSE, "icon": "local_hospital", "color": "#F44336"},
-        {"name": "Educación", "type": CategoryType.EXPENSE, "icon": "school", "color": "#FF9800"},
-        {"name": "Ropa", "type": CategoryType.EXPENSE, "icon": "shopping_bag", "color": "#E91E63"},
-        {"name": "Tecnología", "type": CategoryType.EXPENSE, "icon": "devices", "color": "#00BCD4"},
-        {"name": "Finanzas", "type": CategoryType.EXPENSE, "icon": "account_balance", "color": "#607D8B"},
-        {"name": "Regalos", "type": CategoryType.EXPENSE, "icon": "card_giftcard", "color": "#FFC107"},
-        {"name": "Otros Gastos", "type": CategoryType.EXPENSE, "icon": "more_horiz", "color": "#9E9E9E"},
-        # Ingresos
-        {"name": "Salario", "type": CategoryType.INCOME, "icon": "work", "color": "#4CAF50"},
-        {"name": "Freelance", "type": CategoryType.INCOME, "icon": "business_center", "color": "#8BC34A"},
-        {"name": "Inversiones", "type": CategoryType.INCOME, "icon": "trending_up", "color": "#CDDC39"},
-        {"name": "Otros Ingresos", "type": CategoryType.INCOME, "icon": "attach_money", "color": "#9E9E9E"},
-    ]
-    
-    for cat_data in default_categories:
-        category = Category(
-            user_id=user_id,
-            name=cat_data["name"],
-            type=cat_data["type"],
-            icon=cat_data["icon"],
-            color=cat_data["color"],
-            is_system=True,
-        )
-        db.add(category)
-    
+    bulk_insert(db, Category, [
+        {"user_id": user_id, **cat_data, "is_system": True}
+        for cat_data in _DEFAULT_CATEGORIES
+    ])
     db.commit()
 
 
 @router.get("", response_model=List[CategoryResponse])
 def get_categories(
+    request: Request,
     type: CategoryType = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener categorías del usuario"""
-    query = db.query(Category).filter(
-        Category.user_id == current_user.id,
-        Category.is_hidden == False
-    )
-    
-    if type:
-        query = query.filter(Category.type == type)
+    def load_categories():
+        # Las subcategorías se arman en memoria a partir de las mismas filas
+        query = select(Category).options(
+            noload(Category.subcategories),
+            raiseload("*")
+        ).where(
+            Category.user_id == current_user.id,
+            Category.is_hidden == False
+        )
+        
+        if type:
+            query = query.where(Category.type == type)
+        
+        categories = db.scalars(query.order_by(Category.display_order, Category.name)).all()
+        result = _CATEGORY_LIST.validate_python(categories, from_attributes=True)
+        
+        # Índice por padre en una sola pasada; cada categoría toma sus hijas del índice
+        children = defaultdict(list)
+        for item in result:
+            children[item.parent_id].append(item)
+        for item in result:
+            item.subcategories = children.get(item.id) or None
+        
+        return _CATEGORY_LIST.dump_python(result, mode="json")
     
-    categories = query.order_by(Category.display_order, Category.name).all()
-    return categories
+    with closing_session(db):
+        body, etag = get_or_set_json_with_etag(
+            current_user.id, ("categories", type), load_categories,
+            ttl=cache.REFERENCE_TTL
+        )
+    return conditional_json_response(request, body, etag)
 
 
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -100,10 +124,10 @@ def update_category(
     db: Session = Depends(get_db)
 ):
     """Actualizar categoría"""
-    category = db.query(Category).filter(
+    category = db.scalars(select(Category).where(
         Category.id == category_id,
         Category.user_id == current_user.id
-    ).first()
+    )).first()
     
     if not category:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
@@ -125,10 +149,10 @@ def delete_category(
     db: Session = Depends(get_db)
 ):
     """Eliminar categoría"""
-    category = db.query(Category).filter(
+    category = db.scalars(select(Category).where(
         Category.id == category_id,
         Category.user_id == current_user.id
-    ).first()
+    )).first()
     
     if not category:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
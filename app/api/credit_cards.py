@@ -1,51 +1,64 @@
 """
 Endpoints de tarjetas de crédito
 """
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, Request
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import datetime
+from datetime import date, datetime
 
-from app.database import get_db
+from app.database import get_db, closing_session
 from app.models.user import User
 from app.schemas.credit_card import CreditCardCreate, CreditCardUpdate, CreditCardResponse, InstallmentPurchaseCreate
 from app.utils.security import get_current_active_user
 from app.services.credit_card_service import CreditCardService
+from app.utils import cache
+from app.utils.etag import conditional_json_response, get_or_set_json_with_etag
 
 router = APIRouter()
 
+# Campos de CreditCardResponse calculados por CreditCardService
+_CALCULATED_FIELDS = (
+    "current_balance",
+    "balance_at_cutoff",
+    "post_cutoff_balance",
+    "available_credit",
+    "minimum_payment",
+    "next_cutoff_date",
+    "next_payment_date",
+)
+# Campos que se leen directamente de la tarjeta
+_COLUMN_FIELDS = tuple(
+    field for field in CreditCardResponse.model_fields if field not in _CALCULATED_FIELDS
+)
+
 
 @router.get("", response_model=List[CreditCardResponse])
 def get_credit_cards(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener tarjetas de crédito del usuario"""
-    from app.models.credit_card import CreditCard
-    
-    cards = db.query(CreditCard).filter(
-        CreditCard.user_id == current_user.id,
-        CreditCard.is_active == True
-    ).all()
-    
-    result = []
-    for card in cards:
-        card_info = CreditCardService.get_credit_card_with_calculations(
-            db, current_user.id, card.id
-        )
-        
-        response = CreditCardResponse.from_orm(card_info["credit_card"])
-        response.current_balance = card_info["current_balance"]
-        response.balance_at_cutoff = card_info["balance_at_cutoff"]
-        response.post_cutoff_balance = card_info["post_cutoff_balance"]
-        response.available_credit = card_info["available_credit"]
-        response.minimum_payment = card_info["minimum_payment"]
-        response.next_cutoff_date = card_info["next_cutoff_date"]
-        response.next_payment_date = card_info["next_payment_date"]
+    def load_credit_cards():
+        cards_info = CreditCardService.get_cards_with_calculations(db, current_user.id)
         
-        result.append(response)
+        # Datos internos ya validados: construir sin pasar por los validadores
+        return jsonable_encoder([
+            CreditCardResponse.model_construct(
+                **{field: getattr(card_info["credit_card"], field) for field in _COLUMN_FIELDS},
+                **{field: card_info[field] for field in _CALCULATED_FIELDS}
+            )
+            for card_info in cards_info
+        ])
     
-    return result
+    # Los periodos de corte dependen de la fecha, por eso forma parte de la clave
+    with closing_session(db):
+        body, etag = get_or_set_json_with_etag(
+            current_user.id, ("credit-cards", date.today()), load_credit_cards,
+            ttl=cache.REFERENCE_TTL
+        )
+    return conditional_json_response(request, body, etag)
 
 
 @router.post("", response_model=CreditCardResponse, status_code=status.HTTP_201_CREATED)
@@ -1,260 +1,345 @@
 """
 Endpoints de exportación de datos
 """
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import JSON, Float, Text, cast, func, literal, select
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Union
 from datetime import datetime, date
-import csv
-import io
-import json
+import re
+import zlib
 
-from app.database import get_db
+import orjson
+
+from app.database import get_db_read, closing_session
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.account import Account
-from app.models.category import Category
+from app.models.category import Category, CategoryType
+from app.models.types import Money
 from app.utils.security import get_current_active_user
+from app.utils import cache
 
 router = APIRouter()
 
+# Filas por bloque al leer y enviar exportaciones grandes
+CSV_BATCH_SIZE = 1000
+
+# Vigencia (segundos) del respaldo completo en caché
+EXPORT_TTL = 900
+
+# Nivel de compresión gzip: el más rápido, suficiente para CSV/JSON repetitivos
+GZIP_LEVEL = 1
+
+# Caracteres que obligan a entrecomillar un campo CSV (mismo criterio que csv.writer)
+_NEEDS_QUOTE = re.compile(r'[,"\r\n]')
+
+_CSV_HEADER = "Fecha,Tipo,Monto,Moneda,Cuenta,Categoría,Comercio,Notas,Etiquetas,Reembolsable,Diferido\r\n"
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """
+    Indicar si el cliente acepta respuestas comprimidas con gzip: se leen las
+    codificaciones de Accept-Encoding con su q (q=0 las rechaza; * vale para gzip)
+    """
+    weights = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Comprimir con gzip un flujo de bloques a medida que se generan"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _export_response(request: Request, body: Union[bytes, Iterable[bytes]],
+                     media_type: str, filename: str) -> Response:
+    """
+    Respuesta de descarga, comprimida si el cliente lo acepta.
+    Con bytes se responde completo; con un iterable, en streaming.
+    """
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Vary": "Accept-Encoding",
+    }
+    compress = _accepts_gzip(request)
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    if isinstance(body, bytes):
+        if compress:
+            body = b"".join(_gzip_chunks([body]))
+        return Response(content=body, media_type=media_type, headers=headers)
+    
+    if compress:
+        body = _gzip_chunks(body)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+def _csv_field(value: Optional[str]) -> str:
+    """Formatear un campo de texto para CSV, entrecomillando solo si hace falta"""
+    if not value:
+        return ''
+    if _NEEDS_QUOTE.search(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _csv_row(row) -> str:
+    """Formatear una fila de la consulta de exportación como línea CSV"""
+    (tx_date, tx_type, amount, currency, account_name, category_name,
+     merchant, notes, tags, is_reimbursable, is_installment) = row
+    return ",".join((
+        tx_date.isoformat(sep=' ', timespec='minutes'),
+        tx_type,
+        str(amount),
+        _csv_field(currency),
+        'N/A' if account_name is None else _csv_field(account_name),
+        'N/A' if category_name is None else _csv_field(category_name),
+        _csv_field(merchant),
+        _csv_field(notes),
+        _csv_field(tags),
+        'Sí' if is_reimbursable else 'No',
+        'Sí' if is_installment else 'No'
+    )) + "\r\n"
+
 
 @router.get("/transactions/csv")
 def export_transactions_csv(
+    request: Request,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     account_id: Optional[int] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Exportar transacciones a CSV"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    # Una sola consulta con los nombres de cuenta y categoría, solo con las columnas del CSV
+    query = select(
+        Transaction.date,
+        Transaction.type,
+        Transaction.amount,
+        Transaction.currency,
+        Account.name,
+        Category.name,
+        Transaction.merchant,
+        Transaction.notes,
+        Transaction.tags,
+        Transaction.is_reimbursable,
+        Transaction.is_installment,
+    ).select_from(Transaction).outerjoin(
+        Account, Account.id == Transaction.account_id
+    ).outerjoin(
+        Category, Category.id == Transaction.category_id
+    ).where(Transaction.user_id == current_user.id)
     
     if start_date:
-        query = query.filter(Transaction.date >= start_date)
+        query = query.where(Transaction.date >= start_date)
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
+        query = query.where(Transaction.date <= end_date)
     if account_id:
-        query = query.filter(Transaction.account_id == account_id)
-    
-    transactions = query.order_by(Transaction.date.desc()).all()
-    
-    # Obtener cuentas y categorías para los nombres
-    accounts = {a.id: a.name for a in db.query(Account).filter(
-        Account.user_id == current_user.id
-    ).all()}
-    categories = {c.id: c.name for c in db.query(Category).filter(
-        Category.user_id == current_user.id
-    ).all()}
+        query = query.where(Transaction.account_id == account_id)
     
-    # Crear CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Headers
-    writer.writerow([
-        'Fecha', 'Tipo', 'Monto', 'Moneda', 'Cuenta', 'Categoría',
-        'Comercio', 'Notas', 'Etiquetas', 'Reembolsable', 'Diferido'
-    ])
-    
-    # Datos
-    for tx in transactions:
-        writer.writerow([
-            tx.date.strftime('%Y-%m-%d %H:%M'),
-            tx.type.value,
-            tx.amount,
-            tx.currency,
-            accounts.get(tx.account_id, 'N/A'),
-            categories.get(tx.category_id, 'N/A'),
-            tx.merchant or '',
-            tx.notes or '',
-            tx.tags or '',
-            'Sí' if tx.is_reimbursable else 'No',
-            'Sí' if tx.is_installment else 'No'
-        ])
+    # Leer en lotes en lugar de cargar todas las transacciones a la vez
+    rows = db.execute(
+        query.order_by(Transaction.date.desc()).execution_options(
+            stream_results=True, yield_per=CSV_BATCH_SIZE
+        )
+    )
     
-    output.seek(0)
+    def generate_csv():
+        """Generar el CSV por bloques a medida que se leen las filas"""
+        yield _CSV_HEADER.encode()
+        
+        # Datos: cada lote leído se formatea y codifica de una sola vez
+        for chunk in rows.partitions():
+            yield "".join([_csv_row(row) for row in chunk]).encode()
     
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=transacciones_{date.today().isoformat()}.csv"
-        }
+    return _export_response(
+        request, generate_csv(), "text/csv",
+        f"transacciones_{date.today().isoformat()}.csv"
     )
 
 
 @router.get("/transactions/json")
 def export_transactions_json(
+    request: Request,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Exportar transacciones a JSON"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    query = select(
+        Transaction.id,
+        Transaction.date,
+        Transaction.type,
+        Transaction.amount,
+        Transaction.currency,
+        Transaction.account_id,
+        Transaction.category_id,
+        Transaction.merchant,
+        Transaction.notes,
+        Transaction.tags,
+        Transaction.is_reimbursable,
+        Transaction.is_installment,
+    ).where(Transaction.user_id == current_user.id)
     
     if start_date:
-        query = query.filter(Transaction.date >= start_date)
+        query = query.where(Transaction.date >= start_date)
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
+        query = query.where(Transaction.date <= end_date)
     
-    transactions = query.order_by(Transaction.date.desc()).all()
-    
-    data = []
-    for tx in transactions:
-        data.append({
-            "id": tx.id,
-            "date": tx.date.isoformat(),
-            "type": tx.type.value,
-            "amount": tx.amount,
-            "currency": tx.currency,
-            "account_id": tx.account_id,
-            "category_id": tx.category_id,
-            "merchant": tx.merchant,
-            "notes": tx.notes,
-            "tags": tx.tags,
-            "is_reimbursable": tx.is_reimbursable,
-            "is_installment": tx.is_installment
-        })
+    rows = db.execute(
+        query.order_by(Transaction.date.desc()).execution_options(
+            stream_results=True, yield_per=CSV_BATCH_SIZE
+        )
+    )
+    keys = tuple(rows.keys())
     
-    output = io.StringIO()
-    json.dump(data, output, ensure_ascii=False, indent=2)
-    output.seek(0)
+    def generate_json():
+        """Generar el arreglo JSON por lotes sin armar la lista completa en memoria"""
+        yield b"["
+        separator = b""
+        for chunk in rows.partitions():
+            yield separator + b",".join([orjson.dumps(dict(zip(keys, row))) for row in chunk])
+            separator = b","
+        yield b"]"
     
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="application/json",
-        headers={
-            "Content-Disposition": f"attachment; filename=transacciones_{date.today().isoformat()}.json"
-        }
+    return _export_response(
+        request, generate_json(), "application/json",
+        f"transacciones_{date.today().isoformat()}.json"
     )
 
 
 @router.get("/all-data")
 def export_all_data(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     """Exportar todos los datos del usuario (backup completo)"""
-    from app.models.budget import Budget
-    from app.models.goal import Goal
-    from app.models.credit_card import CreditCard
-    from app.models.subscription import Subscription
+    # Las secciones ya serializadas se reutilizan hasta que el usuario escriba algo;
+    # la fecha de exportación y los datos del usuario se agregan en cada petición
+    sections = cache.get_or_set(
+        current_user.id, "export-all-data",
+        lambda: _build_all_data(db, current_user.id),
+        ttl=EXPORT_TTL
+    )
     
-    # Recopilar todos los datos
-    data = {
-        "export_date": datetime.now().isoformat(),
+    export_date = datetime.now()
+    header = orjson.dumps({
+        "export_date": export_date,
         "user": {
             "id": current_user.id,
             "email": current_user.email,
-            "name": current_user.name,
-            "currency": current_user.default_currency
+            "name": current_user.full_name,
+            "currency": current_user.base_currency
         },
-        "accounts": [],
-        "categories": [],
-        "transactions": [],
-        "budgets": [],
-        "goals": [],
-        "credit_cards": [],
-        "subscriptions": []
-    }
-    
-    # Cuentas
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).all()
-    for acc in accounts:
-        data["accounts"].append({
-            "id": acc.id,
-            "name": acc.name,
-            "type": acc.type,
-            "currency": acc.currency,
-            "initial_balance": acc.initial_balance,
-            "is_archived": acc.is_archived
-        })
-    
-    # Categorías
-    categories = db.query(Category).filter(Category.user_id == current_user.id).all()
-    for cat in categories:
-        data["categories"].append({
-            "id": cat.id,
-            "name": cat.name,
-            "icon": cat.icon,
-            "color": cat.color,
-            "parent_id": cat.parent_id,
-            "is_income": cat.is_income
-        })
-    
-    # Transacciones
-    transactions = db.query(Transaction).filter(Transaction.user_id == current_user.id).all()
-    for tx in transactions:
-        data["transactions"].append({
-            "id": tx.id,
-            "date": tx.date.isoformat(),
-            "type": tx.type.value,
-            "amount": tx.amount,
-            "currency": tx.currency,
-            "account_id": tx.account_id,
-            "category_id": tx.category_id,
-            "merchant": tx.merchant,
-            "notes": tx.notes,
-            "tags": tx.tags
-        })
-    
-    # Presupuestos
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).all()
-    for budget in budgets:
-        data["budgets"].append({
-            "id": budget.id,
-            "name": budget.name,
-            "amount": budget.amount,
-            "period": budget.period,
-            "category_id": budget.category_id,
-            "rollover": budget.rollover_enabled
-        })
+    })
+    content = header[:-1] + b"," + sections[1:]
     
-    # Metas
-    goals = db.query(Goal).filter(Goal.user_id == current_user.id).all()
-    for goal in goals:
-        data["goals"].append({
-            "id": goal.id,
-            "name": goal.name,
-            "target_amount": goal.target_amount,
-            "current_amount": goal.current_amount,
-            "target_date": goal.target_date.isoformat() if goal.target_date else None
-        })
+    return _export_response(
+        request, content, "application/json",
+        f"nexus_backup_{export_date.date().isoformat()}.json"
+    )
+
+
+def _build_all_data(db: Session, user_id: int) -> bytes:
+    """Recopilar y serializar las secciones del respaldo (objeto JSON por sección)"""
+    from app.models.budget import Budget
+    from app.models.goal import Goal
+    from app.models.credit_card import CreditCard
+    from app.models.subscription import Subscription
     
-    # Tarjetas
-    cards = db.query(CreditCard).filter(CreditCard.user_id == current_user.id).all()
-    for card in cards:
-        data["credit_cards"].append({
-            "id": card.id,
-            "name": card.card_name,
-            "credit_limit": card.credit_limit,
-            "cutoff_day": card.cutoff_day,
-            "payment_due_day": card.payment_due_day
-        })
+    # Solo las columnas del respaldo, ya con los nombres de cada campo, en un
+    # orden fijo (sin ORDER BY, SQLite devuelve el orden del índice que elija)
+    queries = {
+        "accounts": select(
+            Account.id, Account.name, Account.type, Account.currency,
+            Account.initial_balance, Account.is_archived
+        ).where(Account.user_id == user_id).order_by(Account.id),
+        "categories": select(
+            Category.id, Category.name, Category.icon, Category.color, Category.parent_id,
+            (Category.type == CategoryType.INCOME).label("is_income")
+        ).where(Category.user_id == user_id).order_by(Category.id),
+        "transactions": select(
+            Transaction.id, Transaction.date, Transaction.type, Transaction.amount,
+            Transaction.currency, Transaction.account_id, Transaction.category_id,
+            Transaction.merchant, Transaction.notes, Transaction.tags
+        ).where(Transaction.user_id == user_id).order_by(
+            Transaction.date.desc(), Transaction.id.desc()
+        ),
+        "budgets": select(
+            Budget.id, Budget.name, Budget.limit_amount.label("amount"), Budget.period,
+            Budget.category_id, Budget.enable_rollover.label("rollover")
+        ).where(Budget.user_id == user_id).order_by(Budget.id),
+        "goals": select(
+            Goal.id, Goal.name, Goal.target_amount, Goal.current_amount, Goal.target_date
+        ).where(Goal.user_id == user_id).order_by(Goal.id),
+        "credit_cards": select(
+            CreditCard.id, CreditCard.card_name.label("name"), CreditCard.credit_limit,
+            CreditCard.cutoff_day, CreditCard.payment_due_day
+        ).where(CreditCard.user_id == user_id).order_by(CreditCard.id),
+        "subscriptions": select(
+            Subscription.id, Subscription.name, Subscription.amount,
+            Subscription.frequency, Subscription.is_active
+        ).where(Subscription.user_id == user_id).order_by(Subscription.id),
+    }
     
-    # Suscripciones
-    subs = db.query(Subscription).filter(Subscription.user_id == current_user.id).all()
-    for sub in subs:
-        data["subscriptions"].append({
-            "id": sub.id,
-            "name": sub.name,
-            "amount": sub.amount,
-            "frequency": sub.frequency,
-            "is_active": sub.is_active
-        })
+    # Todas las lecturas en la transacción de la sesión; la conexión se libera antes de serializar
+    if db.get_bind().dialect.name == "postgresql":
+        # PostgreSQL arma el JSON de todas las secciones en una sola consulta
+        with closing_session(db):
+            return db.execute(_json_sections_query(queries)).scalar().encode()
     
-    output = io.StringIO()
-    json.dump(data, output, ensure_ascii=False, indent=2)
-    output.seek(0)
+    data = {}
+    with closing_session(db):
+        for section, query in queries.items():
+            # Tuplas planas + nombres de columna, sin objetos ORM ni RowMapping por fila
+            result = db.execute(query)
+            keys = tuple(result.keys())
+            data[section] = [dict(zip(keys, row)) for row in result]
     
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="application/json",
-        headers={
-            "Content-Disposition": f"attachment; filename=nexus_backup_{date.today().isoformat()}.json"
-        }
-    )
+    return orjson.dumps(data)
 
+
+def _json_sections_query(queries: dict):
+    """
+    Consulta única (PostgreSQL) que devuelve como texto un objeto JSON con
+    un arreglo por sección, con los mismos campos que la exportación en Python
+    """
+    sections = []
+    for section, query in queries.items():
+        rows = query.subquery()
+        fields = []
+        for column in rows.c:
+            # Los enums ya se guardan por valor; los montos, en centavos
+            value = cast(column, Float) / 100.0 if isinstance(column.type, Money) else column
+            fields.extend((literal(column.name, Text), value))
+        
+        sections.extend((literal(section, Text), select(func.coalesce(
+            func.json_agg(func.json_build_object(*fields)),
+            cast(literal("[]"), JSON)
+        )).select_from(rows).scalar_subquery()))
+    
+    return select(cast(func.json_build_object(*sections), Text))
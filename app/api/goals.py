@@ -1,15 +1,18 @@
 """
 Endpoints de metas financieras
 """
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import date
 
-from app.database import get_db
+from app.database import get_db, closing_session
 from app.models.user import User
-from app.models.goal import Goal
 from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse, GoalContributionCreate
 from app.utils.security import get_current_active_user
+from app.utils import cache
+from app.utils.etag import conditional_response, get_or_set_with_etag
 from app.services.goal_service import GoalService
 
 router = APIRouter()
@@ -17,29 +20,25 @@ router = APIRouter()
 
 @router.get("")
 def get_goals(
+    request: Request,
+    response: Response,
     include_completed: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener metas con cálculos"""
-    query = db.query(Goal).filter(
-        Goal.user_id == current_user.id,
-        Goal.is_archived == False
-    )
-    
-    if not include_completed:
-        query = query.filter(Goal.is_completed == False)
+    def load_goals():
+        return jsonable_encoder(GoalService.get_goals_with_calculations(
+            db, current_user.id, include_completed
+        ))
     
-    goals = query.all()
-    
-    result = []
-    for goal in goals:
-        goal_info = GoalService.get_goal_with_calculations(
-            db, current_user.id, goal.id
+    # Las proyecciones dependen de la fecha actual
+    with closing_session(db):
+        payload, etag = get_or_set_with_etag(
+            current_user.id, ("goals", include_completed, date.today()), load_goals,
+            ttl=cache.LONG_TTL
         )
-        result.append(goal_info)
-    
-    return result
+    return conditional_response(request, response, payload, etag)
 
 
 @router.post("", response_model=GoalResponse, status_code=status.HTTP_201_CREATED)
@@ -1,45 +1,70 @@
 """
 Endpoints de inversiones
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, load_only, raiseload
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, closing_session
 from app.models.user import User
 from app.models.investment import Investment
 from app.schemas.investment import InvestmentCreate, InvestmentUpdate, InvestmentResponse
 from app.utils.security import get_current_active_user
-from app.utils.calculations import calculate_investment_return
+from app.utils import cache
+from app.utils.etag import conditional_json_response, get_or_set_json_with_etag
+from app.utils.calculations import calculate_investment_return, calculate_investment_returns
 
 router = APIRouter()
 
+_INVESTMENT_LIST = TypeAdapter(List[InvestmentResponse])
+
 
 @router.get("", response_model=List[InvestmentResponse])
 def get_investments(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener inversiones con cálculos"""
-    investments = db.query(Investment).filter(
-        Investment.user_id == current_user.id,
-        Investment.is_active == True
-    ).all()
-    
-    result = []
-    for inv in investments:
-        response = InvestmentResponse.from_orm(inv)
+    def load_investments():
+        # Solo las columnas que usa la respuesta; sin cargas perezosas de relaciones
+        investments = db.query(Investment).options(
+            load_only(
+                Investment.id, Investment.user_id, Investment.name, Investment.ticker,
+                Investment.type, Investment.quantity, Investment.purchase_price,
+                Investment.current_price, Investment.purchase_date, Investment.last_price_update,
+                Investment.broker_account, Investment.currency, Investment.notes,
+                Investment.is_active, Investment.created_at
+            ),
+            raiseload("*")
+        ).filter(
+            Investment.user_id == current_user.id,
+            Investment.is_active == True
+        ).all()
         
-        # Calcular valores
-        response.market_value = inv.quantity * inv.current_price
-        response.cost_basis = inv.quantity * inv.purchase_price
-        response.unrealized_gain, response.unrealized_gain_percentage = calculate_investment_return(
-            inv.purchase_price, inv.current_price, inv.quantity
+        # Calcular valores de todas las inversiones por columnas
+        returns = calculate_investment_returns(
+            [inv.quantity for inv in investments],
+            [inv.purchase_price for inv in investments],
+            [inv.current_price for inv in investments]
         )
         
-        result.append(response)
+        # Validar la lista completa de una vez con el validador precompilado
+        result = _INVESTMENT_LIST.validate_python(investments, from_attributes=True)
+        for item, (market_value, cost_basis, gain, gain_percentage) in zip(result, returns):
+            item.market_value = market_value
+            item.cost_basis = cost_basis
+            item.unrealized_gain = gain
+            item.unrealized_gain_percentage = gain_percentage
+        
+        return _INVESTMENT_LIST.dump_python(result, mode="json")
     
-    return result
+    with closing_session(db):
+        body, etag = get_or_set_json_with_etag(
+            current_user.id, "investments", load_investments, ttl=cache.REFERENCE_TTL
+        )
+    return conditional_json_response(request, body, etag)
 
 
 @router.post("", response_model=InvestmentResponse, status_code=status.HTTP_201_CREATED)
@@ -1,17 +1,20 @@
 """
 Endpoints de transacciones recurrentes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import datetime
 from enum import Enum
 
-from app.database import get_db
+from app.database import get_db, closing_session
 from app.models.user import User
 from app.models.transaction import RecurrenceFrequency, TransactionType
 from app.utils.security import get_current_active_user
+from app.utils import cache
+from app.utils.etag import conditional_response, get_or_set_with_etag
 from app.services.recurring_service import RecurringTransactionService
 
 router = APIRouter()
@@ -75,22 +78,37 @@ class RecurringTransactionResponse(BaseModel):
     last_created_date: datetime = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+_RECURRING_LIST = TypeAdapter(List[RecurringTransactionResponse])
 
 
 @router.get("", response_model=List[RecurringTransactionResponse])
 def get_recurring_transactions(
+    request: Request,
+    response: Response,
     active_only: bool = True,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener transacciones recurrentes"""
-    return RecurringTransactionService.get_recurring_transactions(
-        db=db,
-        user_id=current_user.id,
-        active_only=active_only
-    )
+    def load_recurring():
+        recurring = RecurringTransactionService.get_recurring_transactions(
+            db=db,
+            user_id=current_user.id,
+            active_only=active_only
+        )
+        return _RECURRING_LIST.dump_python(
+            _RECURRING_LIST.validate_python(recurring, from_attributes=True), mode="json"
+        )
+    
+    with closing_session(db):
+        payload, etag = get_or_set_with_etag(
+            current_user.id, ("recurring", active_only), load_recurring,
+            ttl=cache.REFERENCE_TTL
+        )
+    return conditional_response(request, response, payload, etag)
 
 
 @router.post("", response_model=RecurringTransactionResponse, status_code=status.HTTP_201_CREATED)
@@ -152,17 +170,18 @@ def get_upcoming_recurring(
         days=days
     )
     
-    return [
+    # orjson serializa fechas y enums directamente
+    return ORJSONResponse([
         {
             "id": item["recurring"].id,
             "name": item["recurring"].name,
             "amount": item["recurring"].amount,
             "type": item["recurring"].type,
-            "next_date": item["next_date"].isoformat(),
+            "next_date": item["next_date"],
             "days_until": item["days_until"]
         }
         for item in upcoming
-    ]
+    ])
 
 
 @router.post("/process", status_code=status.HTTP_200_OK)
@@ -1,15 +1,18 @@
 """
 Endpoints de suscripciones
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import datetime, date
 
-from app.database import get_db
+from app.database import get_db, closing_session
 from app.models.user import User
 from app.utils.security import get_current_active_user
+from app.utils import cache
+from app.utils.etag import conditional_response, get_or_set_with_etag
 from app.services.subscription_service import SubscriptionService
 
 router = APIRouter()
@@ -66,22 +69,37 @@ class SubscriptionResponse(BaseModel):
     url: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+_SUBSCRIPTION_LIST = TypeAdapter(List[SubscriptionResponse])
 
 
 @router.get("", response_model=List[SubscriptionResponse])
 def get_subscriptions(
+    request: Request,
+    response: Response,
     active_only: bool = True,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener suscripciones del usuario"""
-    return SubscriptionService.get_subscriptions(
-        db=db,
-        user_id=current_user.id,
-        active_only=active_only
-    )
+    def load_subscriptions():
+        subscriptions = SubscriptionService.get_subscriptions(
+            db=db,
+            user_id=current_user.id,
+            active_only=active_only
+        )
+        return _SUBSCRIPTION_LIST.dump_python(
+            _SUBSCRIPTION_LIST.validate_python(subscriptions, from_attributes=True), mode="json"
+        )
+    
+    with closing_session(db):
+        payload, etag = get_or_set_with_etag(
+            current_user.id, ("subscriptions", active_only), load_subscriptions,
+            ttl=cache.REFERENCE_TTL
+        )
+    return conditional_response(request, response, payload, etag)
 
 
 @router.post("", response_model=SubscriptionResponse, status_code=status.HTTP_201_CREATED)
@@ -177,9 +195,10 @@ def get_upcoming_renewals(
     db: Session = Depends(get_db)
 ):
     """Obtener renovaciones próximas"""
-    return SubscriptionService.get_upcoming_renewals(
+    # orjson serializa las fechas directamente
+    return ORJSONResponse(SubscriptionService.get_upcoming_renewals(
         db=db,
         user_id=current_user.id,
         days=days
-    )
+    ))
 
@@ -2,6 +2,8 @@
 Endpoints de transacciones
 """
 from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -15,11 +17,14 @@ from app.services.transaction_service import TransactionService
 
 router = APIRouter()
 
+_TRANSACTION_LIST = TypeAdapter(List[TransactionResponse])
+
 
 @router.get("", response_model=List[TransactionResponse])
 def get_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
     account_id: Optional[int] = None,
     category_id: Optional[int] = None,
     type: Optional[TransactionType] = None,
@@ -38,10 +43,20 @@ def get_transactions(
         category_id=category_id,
         type=type,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        cursor=cursor
     )
     
-    return transactions
+    # Página completa: indicar desde dónde pedir la siguiente
+    headers = {}
+    if len(transactions) == limit:
+        headers["X-Next-Cursor"] = TransactionService.encode_cursor(transactions[-1])
+    
+    # Validar y serializar la lista completa de una vez con el validador precompilado
+    payload = _TRANSACTION_LIST.dump_python(
+        _TRANSACTION_LIST.validate_python(transactions, from_attributes=True), mode="json"
+    )
+    return ORJSONResponse(payload, headers=headers)
 
 
 @router.post("", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
@@ -1,8 +1,10 @@
 """
 Configuración de la aplicación
 """
+from datetime import timedelta
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -21,10 +23,28 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     DEBUG: bool = True
     
+    # CORS (lista JSON en el entorno, p. ej. CORS_ORIGINS='["https://app.example.com"]')
+    CORS_ORIGINS: List[str] = ["*"]
+    
+    # Startup
+    INIT_DB: bool = True  # create_all al arrancar (desactivar si el esquema lo gestiona Alembic)
+    MIGRATION_MODE: str = "async"  # async | sync | skip
+    LAZY_ROUTERS: bool = False  # importar los routers en el arranque y no al importar app.main
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
+        frozen = True
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Configuración validada una sola vez (también usable con Depends)"""
+    return Settings()
+
 
+settings = get_settings()
 
-settings = Settings()
+# Valores derivados, calculados una vez al importar
+ACCESS_TOKEN_EXPIRE_DELTA = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
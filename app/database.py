@@ -1,19 +1,133 @@
 """
 Configuración de la base de datos
 """
-from sqlalchemy import create_engine
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from sqlalchemy import create_engine, event, insert, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import raiseload, sessionmaker
 from app.config import settings
 
+# Valores derivados de DATABASE_URL, calculados una vez al importar
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+DB_PATH = settings.DATABASE_URL[len("sqlite:///"):] if IS_SQLITE else None
+_IS_SQLITE_MEMORY = IS_SQLITE and (
+    settings.DATABASE_URL in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in settings.DATABASE_URL
+)
+
+# Tamaño del pool: SQLite en archivo no se desconecta solo, así que las
+# conexiones (y sus PRAGMAs) se reutilizan sin ping previo. Mínimo de 5 (el valor
+# por defecto) y con desborde: cada request autenticado retiene una conexión de
+# escritura y una exportación en streaming retiene dos hasta terminar
+POOL_SIZE = max(5, (os.cpu_count() or 2) * 2)
+MAX_OVERFLOW = 10
+
+if _IS_SQLITE_MEMORY:
+    # Una base en memoria solo existe dentro de su conexión: compartir una sola
+    _pool_args = {"poolclass": StaticPool}
+elif IS_SQLITE:
+    _pool_args = {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_recycle": 3600}
+else:
+    _pool_args = {
+        "pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW,
+        "pool_pre_ping": True, "pool_recycle": 3600,
+    }
+    if make_url(settings.DATABASE_URL).get_driver_name() == "psycopg2":
+        # Los executemany (bulk_insert, UPDATE por lotes) usan los helpers
+        # rápidos de psycopg2 en lugar de una sentencia por fila
+        _pool_args["executemany_mode"] = "values_plus_batch"
+
 # Engine
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    # Caché de SQL compilado más amplia que la de por defecto (500)
+    query_cache_size=1200,
+    **_pool_args
+)
+
+_IS_SQLITE_FILE = (
+    engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:")
+)
+
+# PRAGMAs de SQLite para cada conexión nueva: WAL permite leer mientras se
+# escribe y synchronous=NORMAL evita un fsync por commit
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA wal_autocheckpoint=1000",
+)
+
+# Las conexiones de solo lectura no pueden cambiar el modo del journal
+_SQLITE_READ_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
 )
 
+
+def _register_pragmas(target_engine, pragmas):
+    """Ejecutar los PRAGMAs indicados en cada conexión nueva del engine"""
+    @event.listens_for(target_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _optimize_on_close(dbapi_connection, connection_record):
+    """Actualizar las estadísticas del planificador al cerrar una conexión"""
+    try:
+        dbapi_connection.execute("PRAGMA optimize")
+    except Exception:
+        pass
+
+
+def optimize_sqlite():
+    """Ejecutar PRAGMA optimize (solo SQLite en archivo)"""
+    if not _IS_SQLITE_FILE:
+        return
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+
+
+if _IS_SQLITE_FILE:
+    _register_pragmas(engine, _SQLITE_PRAGMAS)
+    event.listen(engine, "close", _optimize_on_close)
+    
+    # Engine de solo lectura (mode=ro) para endpoints que solo consultan;
+    # con WAL sus lecturas no bloquean ni esperan a las escrituras
+    read_engine = create_engine(
+        f"sqlite:///file:{engine.url.database}?mode=ro&uri=true",
+        connect_args={"check_same_thread": False},
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_recycle=3600,
+        query_cache_size=1200
+    )
+    _register_pragmas(read_engine, _SQLITE_READ_PRAGMAS)
+else:
+    read_engine = engine
+
 # Session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Base para modelos
 Base = declarative_base()
@@ -28,14 +142,100 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Inicializar base de datos"""
-    import os
+# Sesión de escritura (la de siempre)
+get_db_write = get_db
+
+
+def get_db_read():
+    """Dependency para obtener sesión de BD de solo lectura"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# La configuración es inmutable: la opción de DEBUG se resuelve una sola vez
+_DEBUG_LOAD_OPTIONS = (raiseload("*"),) if settings.DEBUG else ()
+
+
+def safe_load(*options):
+    """
+    Opciones de carga para consultas de listados; en DEBUG se agrega
+    raiseload("*") para que una carga perezosa accidental falle en lugar
+    de generar consultas N+1 silenciosas
+    """
+    return [*options, *_DEBUG_LOAD_OPTIONS]
+
+
+def bulk_insert(db, model, rows):
+    """
+    Insertar varias filas (diccionarios) en un solo INSERT multi-fila,
+    en lugar de un add() por objeto
+    """
+    if rows:
+        db.execute(insert(model), rows)
+
+
+@contextmanager
+def closing_session(db):
+    """
+    Cerrar la sesión al salir del bloque, para devolver la conexión al pool
+    antes de serializar la respuesta. No abre una transacción propia ni la
+    marca como de solo lectura; los objetos ya cargados quedan desasociados
+    """
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _create_tables() -> bool:
+    """create_all; indica si el esquema se creó desde cero (sin tabla users previa)"""
+    fresh = not inspect(engine).has_table("users")
+    Base.metadata.create_all(bind=engine)
+    return fresh
+
+
+def init_db() -> bool:
+    """
+    Inicializar base de datos.
+    Retorna True si las tablas se crearon desde cero con los tipos actuales
+    """
     # Crear directorio de datos si no existe (para SQLite)
-    if "sqlite" in settings.DATABASE_URL:
-        db_path = settings.DATABASE_URL.replace("sqlite:///", "")
-        db_dir = os.path.dirname(db_path)
+    if IS_SQLITE:
+        db_dir = os.path.dirname(DB_PATH)
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
-    Base.metadata.create_all(bind=engine)
-
+    
+    if not _IS_SQLITE_FILE:
+        return _create_tables()
+    
+    # Marcador junto a la base con las tablas ya creadas: si coincide con los
+    # modelos actuales se omite create_all (y su consulta a sqlite_master por tabla)
+    db_path = engine.url.database
+    marker_path = f"{db_path}.initialized"
+    tables = "\n".join(sorted(Base.metadata.tables))
+    
+    def is_initialized(marker) -> bool:
+        marker.seek(0)
+        return os.path.exists(db_path) and marker.read() == tables
+    
+    with open(marker_path, "a+") as marker:
+        if is_initialized(marker):
+            return False
+        # Un solo worker crea las tablas; los demás esperan y ven el marcador
+        if fcntl:
+            fcntl.flock(marker, fcntl.LOCK_EX)
+        try:
+            if is_initialized(marker):
+                return False
+            fresh = _create_tables()
+            marker.seek(0)
+            marker.truncate()
+            marker.write(tables)
+            marker.flush()
+            return fresh
+        finally:
+            if fcntl:
+                fcntl.flock(marker, fcntl.LOCK_UN)
@@ -1,115 +1,450 @@
 """
 Aplicación principal FastAPI
 """
-from fastapi import FastAPI
+import asyncio
+import importlib
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+import orjson
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.config import settings
-from app.database import init_db
-from app.api import (
-    auth, accounts, categories, transactions, credit_cards, 
-    budgets, goals, investments, analytics,
-    recurring_transactions, alerts, subscriptions, can_spend, exports
-)
+from app.database import DB_PATH, IS_SQLITE, init_db, optimize_sqlite
 
 # Crear aplicación
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
     description="API para gestión financiera personal",
+    # orjson serializa las respuestas más rápido que json de la librería estándar
+    default_response_class=ORJSONResponse,
 )
 
-# Configurar CORS
+# Configurar CORS: métodos y headers explícitos, y preflight cacheado un día
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # En producción, especificar orígenes
+    allow_origins=settings.CORS_ORIGINS,  # En producción, especificar orígenes
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+    expose_headers=["ETag", "X-Next-Cursor"],
+    max_age=86400,
+)
+
+# Routers de la API: (módulo, prefijo, tag). Cada uno se incluye una sola vez
+# directamente en la app; anidarlos en un router intermedio volvería a
+# construir cada APIRoute al incluir ese router
+ROUTERS = (
+    ("app.api.auth", "/api/auth", "auth"),
+    ("app.api.accounts", "/api/accounts", "accounts"),
+    ("app.api.categories", "/api/categories", "categories"),
+    ("app.api.transactions", "/api/transactions", "transactions"),
+    ("app.api.credit_cards", "/api/credit-cards", "credit-cards"),
+    ("app.api.budgets", "/api/budgets", "budgets"),
+    ("app.api.goals", "/api/goals", "goals"),
+    ("app.api.investments", "/api/investments", "investments"),
+    ("app.api.analytics", "/api/analytics", "analytics"),
+    ("app.api.recurring_transactions", "/api/recurring-transactions", "recurring-transactions"),
+    ("app.api.alerts", "/api/alerts", "alerts"),
+    ("app.api.subscriptions", "/api/subscriptions", "subscriptions"),
+    ("app.api.can_spend", "/api/can-i-spend", "can-i-spend"),
+    ("app.api.exports", "/api/exports", "exports"),
 )
 
-# Incluir routers
-app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(accounts.router, prefix="/api/accounts", tags=["accounts"])
-app.include_router(categories.router, prefix="/api/categories", tags=["categories"])
-app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
-app.include_router(credit_cards.router, prefix="/api/credit-cards", tags=["credit-cards"])
-app.include_router(budgets.router, prefix="/api/budgets", tags=["budgets"])
-app.include_router(goals.router, prefix="/api/goals", tags=["goals"])
-app.include_router(investments.router, prefix="/api/investments", tags=["investments"])
-app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
-app.include_router(recurring_transactions.router, prefix="/api/recurring-transactions", tags=["recurring-transactions"])
-app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"])
-app.include_router(subscriptions.router, prefix="/api/subscriptions", tags=["subscriptions"])
-app.include_router(can_spend.router, prefix="/api/can-i-spend", tags=["can-i-spend"])
-app.include_router(exports.router, prefix="/api/exports", tags=["exports"])
+
+def _include_routers():
+    """Importar los módulos de la API e incluir sus routers"""
+    for module_name, prefix, tag in ROUTERS:
+        module = importlib.import_module(module_name)
+        app.include_router(module.router, prefix=prefix, tags=[tag])
+    
+    # Generar ya el esquema OpenAPI (y con él el JSON schema de cada modelo):
+    # FastAPI lo guarda en app.openapi_schema y la primera petición no lo paga.
+    # Con --preload el esquema queda construido antes de crear los workers
+    app.openapi()
+
+
+# En desarrollo se incluyen al importar (--reload los recarga como siempre);
+# con LAZY_ROUTERS la importación se hace en el arranque, fuera del import de la app
+if not settings.LAZY_ROUTERS:
+    _include_routers()
+
+
+# Estado de las migraciones de arranque (visible en /health)
+MIGRATION_STATUS = {"state": "pending"}
+
+# Cada cuánto (segundos) refrescar las estadísticas de SQLite
+OPTIMIZE_INTERVAL = 900
+
+# Tareas de fondo en curso: el event loop solo guarda referencias débiles
+_BACKGROUND_TASKS = set()
+
+
+def _start_background(coro) -> asyncio.Task:
+    """Crear una tarea de fondo, conservar su referencia y registrar sus errores"""
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_on_background_done)
+    return task
+
+
+def _on_background_done(task: asyncio.Task):
+    """Soltar la referencia de la tarea terminada y mostrar su error, si lo hubo"""
+    _BACKGROUND_TASKS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️ Error en tarea de fondo: {task.exception()!r}")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Inicializar base de datos al arrancar"""
-    init_db()
-    # Ejecutar migraciones pendientes
-    _run_migrations()
+    # Los routers importan los modelos que create_all necesita
+    if settings.LAZY_ROUTERS:
+        _include_routers()
+    
+    # Tablas recién creadas ya tienen los tipos actuales: no hay datos que
+    # convertir, las migraciones se registran como aplicadas
+    if settings.INIT_DB and init_db():
+        _mark_all_applied()
+    
+    # Ejecutar migraciones pendientes sin retrasar el arranque, salvo las que
+    # reescriben datos: esas deben terminar antes de aceptar escrituras
+    in_background = settings.MIGRATION_MODE == "async" and not _has_pending_data_migrations()
+    if in_background:
+        _start_background(asyncio.to_thread(_run_migrations_locked))
+    elif settings.MIGRATION_MODE in ("sync", "async"):
+        _run_migrations_locked()
+    else:
+        MIGRATION_STATUS["state"] = "skipped"
+    
+    # Con una conversión de datos pendiente (omitida o fallida), las escrituras
+    # nuevas, ya en centavos, se volverían a convertir en el siguiente arranque
+    if not in_background and _has_pending_data_migrations():
+        raise RuntimeError(
+            "Migraciones de datos pendientes (ver schema_migrations): "
+            "ejecútalas con MIGRATION_MODE=sync antes de arrancar"
+        )
+    
+    if IS_SQLITE:
+        _start_background(_periodic_optimize())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cancelar y esperar las tareas de fondo al detener la app"""
+    tasks = list(_BACKGROUND_TASKS)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _periodic_optimize():
+    """Ejecutar PRAGMA optimize periódicamente mientras la app esté activa"""
+    while True:
+        await asyncio.sleep(OPTIMIZE_INTERVAL)
+        try:
+            await asyncio.to_thread(optimize_sqlite)
+        except Exception as e:
+            print(f"⚠️ Error ejecutando PRAGMA optimize: {e}")
+
+
+def _has_pending_data_migrations() -> bool:
+    """Indicar si falta alguna migración que reescribe datos existentes"""
+    from sqlalchemy import text
+    from app.database import engine
+    
+    try:
+        with engine.connect() as conn:
+            applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+    except Exception:
+        # Sin tabla schema_migrations todavía
+        return True
+    return not applied.issuperset(_DATA_MIGRATIONS)
+
+
+def _migration_lock_path() -> str:
+    """Archivo de bloqueo junto a la base SQLite (o en el directorio temporal)"""
+    if IS_SQLITE:
+        db_dir = os.path.dirname(DB_PATH)
+        if db_dir:
+            return os.path.join(db_dir, ".migrations.lock")
+    return os.path.join(tempfile.gettempdir(), "nexus_migrations.lock")
+
+
+def _run_migrations_locked():
+    """Ejecutar las migraciones con un bloqueo de archivo (un worker a la vez)"""
+    MIGRATION_STATUS["state"] = "running"
+    with open(_migration_lock_path(), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            ok = _run_migrations()
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    MIGRATION_STATUS["state"] = "succeeded" if ok else "failed"
+
+
+# Migraciones registradas en schema_migrations una vez aplicadas
+_SUBSCRIPTION_INVESTMENT_FIELDS = "subscriptions_investment_fields"
+_ACCOUNTS_UNIQUE_DEFAULT = "accounts_unique_default"
+_ENUM_COLUMNS_AS_VALUES = "enum_columns_as_values"
+_MONEY_COLUMNS_IN_CENTS = "money_columns_in_cents"
+_TRANSACTION_ENUMS_AS_VALUES = "transaction_enums_as_values"
+_TRANSACTION_MONEY_IN_CENTS = "transaction_money_in_cents"
+_DROP_REDUNDANT_INDEXES = "drop_redundant_indexes"
+
+# Migraciones que no pueden correr en paralelo con escrituras de la app
+_DATA_MIGRATIONS = (
+    _ENUM_COLUMNS_AS_VALUES, _MONEY_COLUMNS_IN_CENTS, _TRANSACTION_ENUMS_AS_VALUES,
+    _TRANSACTION_MONEY_IN_CENTS,
+)
+
+# Columnas que antes eran Enum (guardaban el nombre, p. ej. 'CASH') y ahora
+# son texto con el valor ('cash')
+_FORMER_ENUM_COLUMNS = (
+    ("accounts", "type"),
+    ("alerts", "type"),
+    ("alerts", "priority"),
+    ("budgets", "type"),
+    ("budgets", "period"),
+    ("categories", "type"),
+    ("goals", "type"),
+    ("goals", "priority"),
+    ("investments", "type"),
+    ("investment_transactions", "type"),
+)
+
+# Columnas Enum que guardaban el nombre y ahora guardan el valor (values_callable)
+_TRANSACTION_ENUM_COLUMNS = (
+    ("transactions", "type"),
+    ("recurring_transactions", "type"),
+    ("recurring_transactions", "frequency"),
+)
+
+# Columnas de montos que pasaron de Float a centavos enteros (Money)
+_MONEY_COLUMNS = (
+    ("accounts", "initial_balance"),
+    ("budgets", "limit_amount"),
+    ("goals", "target_amount"),
+    ("goals", "current_amount"),
+    ("investment_transactions", "total_amount"),
+    ("subscriptions", "amount"),
+    ("credit_cards", "credit_limit"),
+)
+
+# Montos de transacciones, divisiones y recurrentes que pasaron a Money
+_TRANSACTION_MONEY_COLUMNS = (
+    ("transactions", "amount"),
+    ("transaction_splits", "amount"),
+    ("recurring_transactions", "amount"),
+)
+
+# Índices que ya no se declaran: duplicaban la clave primaria o se reemplazaron
+# por un índice parcial
+_DROPPED_INDEXES = tuple(
+    f"ix_{table}_id" for table in (
+        "users", "accounts", "categories", "transactions", "transaction_splits",
+        "recurring_transactions", "budgets", "goals", "goal_contributions",
+        "credit_cards", "credit_card_periods", "installment_purchases",
+        "investments", "investment_transactions", "subscriptions", "alerts",
+    )
+) + ("ix_recurring_transactions_active_auto",)
 
 
 def _run_migrations():
-    """Ejecutar migraciones necesarias"""
+    """
+    Ejecutar migraciones necesarias. Cada paso corre en su propia transacción:
+    si uno falla se registra el error y se siguen intentando los demás
+    """
+    import traceback
+    from sqlalchemy import text
+    from app.database import Base, engine
+    
     try:
-        from sqlalchemy import inspect, text
-        from app.database import engine
-        
-        inspector = inspect(engine)
-        columns = [col['name'] for col in inspector.get_columns('subscriptions')]
-        
-        # Verificar si faltan las columnas de inversión
-        needs_is_investment = 'is_investment' not in columns
-        needs_investment_id = 'investment_id' not in columns
-        
-        if needs_is_investment or needs_investment_id:
-            with engine.begin() as conn:
-                if needs_is_investment:
-                    try:
-                        conn.execute(text("""
-                            ALTER TABLE subscriptions 
-                            ADD COLUMN is_investment BOOLEAN DEFAULT 0
-                        """))
-                        print("✅ Columna is_investment agregada")
-                    except Exception as e:
-                        error_str = str(e).lower()
-                        if "duplicate column" not in error_str and "already exists" not in error_str:
-                            raise
-                
-                if needs_investment_id:
-                    try:
-                        conn.execute(text("""
-                            ALTER TABLE subscriptions 
-                            ADD COLUMN investment_id INTEGER
-                        """))
-                        print("✅ Columna investment_id agregada")
-                    except Exception as e:
-                        error_str = str(e).lower()
-                        if "duplicate column" not in error_str and "already exists" not in error_str:
-                            raise
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations (version VARCHAR PRIMARY KEY)"
+            ))
+            applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
     except Exception as e:
-        # Si hay un error, no bloqueamos el arranque pero lo registramos
-        print(f"⚠️ Error ejecutando migraciones: {e}")
-        import traceback
+        print(f"⚠️ Error leyendo schema_migrations: {e}")
         traceback.print_exc()
+        return False
+    
+    ok = True
+    for version, step in _MIGRATION_STEPS:
+        if version in applied:
+            continue
+        try:
+            # El registro en schema_migrations va en la misma transacción que el paso
+            with engine.begin() as conn:
+                step(conn)
+                _mark_applied(conn, version)
+        except Exception as e:
+            # Si hay un error, no bloqueamos los demás pasos pero lo registramos
+            ok = False
+            print(f"⚠️ Error ejecutando la migración {version}: {e}")
+            traceback.print_exc()
+    
+    # Crear en bases existentes los índices declarados en los modelos
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                ok = False
+                print(f"⚠️ Error creando el índice {index.name}: {e}")
+    return ok
+
+
+def _add_subscription_investment_fields(conn):
+    """Agregar a subscriptions las columnas de inversión que falten"""
+    from sqlalchemy import inspect, text
+    if conn.dialect.name == "sqlite":
+        # Una sola consulta en lugar de la reflexión del inspector
+        columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(subscriptions)")}
+    else:
+        columns = {col['name'] for col in inspect(conn).get_columns('subscriptions')}
+    
+    if 'is_investment' not in columns:
+        conn.execute(text("""
+            ALTER TABLE subscriptions 
+            ADD COLUMN is_investment BOOLEAN DEFAULT false
+        """))
+        print("✅ Columna is_investment agregada")
+    
+    if 'investment_id' not in columns:
+        conn.execute(text("""
+            ALTER TABLE subscriptions 
+            ADD COLUMN investment_id INTEGER
+        """))
+        print("✅ Columna investment_id agregada")
+
+
+def _unique_default_account(conn):
+    """Índice único parcial: una sola cuenta por defecto por usuario"""
+    from sqlalchemy import text
+    # Conservar solo la cuenta por defecto más antigua de cada usuario.
+    # true/false sirven igual en SQLite y en columnas boolean de PostgreSQL
+    conn.execute(text("""
+        UPDATE accounts SET is_default = false
+        WHERE is_default = true AND id NOT IN (
+            SELECT MIN(id) FROM accounts
+            WHERE is_default = true
+            GROUP BY user_id
+        )
+    """))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_accounts_user_default
+        ON accounts (user_id) WHERE is_default = true
+    """))
+
+
+def _drop_redundant_indexes(conn):
+    """Eliminar índices que ya no se declaran en los modelos"""
+    from sqlalchemy import text
+    for index in _DROPPED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
 
 
-@app.get("/")
-async def root():
+def _lowercase_enum_columns(conn, columns):
+    """Pasar de nombre a valor de enum (el valor es el nombre en minúsculas)"""
+    from sqlalchemy import text
+    for table, column in columns:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE VARCHAR "
+                f"USING lower({column}::text)"
+            ))
+        else:
+            conn.execute(text(f"UPDATE {table} SET {column} = lower({column})"))
+
+
+def _columns_to_cents(conn, columns):
+    """Pasar montos Float a centavos enteros (Money)"""
+    from sqlalchemy import text
+    for table, column in columns:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT "
+                f"USING round({column} * 100)"
+            ))
+        else:
+            conn.execute(text(
+                f"UPDATE {table} SET {column} = CAST(round({column} * 100) AS INTEGER)"
+            ))
+
+
+def _mark_all_applied():
+    """Registrar todas las migraciones como aplicadas (esquema recién creado)"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+    from app.database import engine
+    
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations (version VARCHAR PRIMARY KEY)"
+            ))
+            applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+            for version, _ in _MIGRATION_STEPS:
+                if version not in applied:
+                    _mark_applied(conn, version)
+    except IntegrityError:
+        # Otro worker las registró al mismo tiempo
+        pass
+
+
+def _mark_applied(conn, version: str):
+    """Registrar una migración como aplicada"""
+    from sqlalchemy import text
+    conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
+
+
+# Pasos de migración en orden de aplicación: (versión, función(conn))
+_MIGRATION_STEPS = (
+    (_SUBSCRIPTION_INVESTMENT_FIELDS, _add_subscription_investment_fields),
+    (_ACCOUNTS_UNIQUE_DEFAULT, _unique_default_account),
+    # Los valores de enum coinciden con el nombre en minúsculas
+    (_ENUM_COLUMNS_AS_VALUES, lambda conn: _lowercase_enum_columns(conn, _FORMER_ENUM_COLUMNS)),
+    (_TRANSACTION_ENUMS_AS_VALUES, lambda conn: _lowercase_enum_columns(conn, _TRANSACTION_ENUM_COLUMNS)),
+    (_MONEY_COLUMNS_IN_CENTS, lambda conn: _columns_to_cents(conn, _MONEY_COLUMNS)),
+    (_TRANSACTION_MONEY_IN_CENTS, lambda conn: _columns_to_cents(conn, _TRANSACTION_MONEY_COLUMNS)),
+    (_DROP_REDUNDANT_INDEXES, _drop_redundant_indexes),
+)
+
+
+# Respuestas de "/" y "/health" ya serializadas. Se registran como rutas de
+# Starlette (add_route), sin dependencias ni validación de respuesta de FastAPI
+_ROOT_BODY = orjson.dumps({
+    "name": settings.APP_NAME,
+    "version": settings.VERSION,
+    "status": "running"
+})
+_HEALTH_BODIES = {
+    state: orjson.dumps({"status": "healthy", "migrations": state})
+    for state in ("pending", "running", "succeeded", "failed", "skipped")
+}
+
+
+async def root(request: Request):
     """Endpoint raíz"""
-    return {
-        "name": settings.APP_NAME,
-        "version": settings.VERSION,
-        "status": "running"
-    }
+    return Response(_ROOT_BODY, media_type="application/json")
 
 
-@app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check"""
-    return {"status": "healthy"}
+    return Response(_HEALTH_BODIES[MIGRATION_STATUS["state"]], media_type="application/json")
+
 
+app.add_route("/", root, include_in_schema=False)
+app.add_route("/health", health_check, include_in_schema=False)
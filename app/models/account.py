@@ -1,11 +1,12 @@
 """
 Modelo de Cuentas
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.database import Base
+from app.models.types import Money
 
 
 class AccountType(str, enum.Enum):
@@ -23,14 +24,13 @@ class Account(Base):
     """Modelo de cuenta financiera"""
     
     __tablename__ = "accounts"
-    
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Información básica
     name = Column(String, nullable=False)
-    type = Column(Enum(AccountType), nullable=False)
-    initial_balance = Column(Float, default=0.0)
+    type = Column(String, nullable=False)
+    initial_balance = Column(Money, default=0.0)
     currency = Column(String, default="MXN")
     
     # Personalización
@@ -53,5 +53,22 @@ class Account(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    transactions = relationship("Transaction", back_populates="account", foreign_keys="Transaction.account_id")
+    transactions = relationship("Transaction", back_populates="account", foreign_keys="Transaction.account_id", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra AccountType y guardar el valor como texto"""
+        return AccountType(value).value
+
+
+# Como máximo una cuenta por defecto por usuario
+Index(
+    "uq_accounts_user_default",
+    Account.user_id,
+    unique=True,
+    sqlite_where=Account.is_default == True,
+    postgresql_where=Account.is_default == True,
+)
 
+# Filtro habitual: cuentas del usuario por estado de archivo
+Index("ix_accounts_user_archived", Account.user_id, Account.is_archived)
@@ -1,9 +1,9 @@
 """
 Modelo de Alertas y Notificaciones
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.database import Base
 
@@ -38,12 +38,12 @@ class Alert(Base):
     
     __tablename__ = "alerts"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Tipo y prioridad
-    type = Column(Enum(AlertType), nullable=False)
-    priority = Column(Enum(AlertPriority), default=AlertPriority.MEDIUM)
+    type = Column(String, nullable=False)
+    priority = Column(String, default=AlertPriority.MEDIUM.value)
     
     # Contenido
     title = Column(String, nullable=False)
@@ -68,8 +68,21 @@ class Alert(Base):
     read_at = Column(DateTime, nullable=True)
     
     # Relaciones
-    related_transaction = relationship("Transaction")
-    related_budget = relationship("Budget")
-    related_goal = relationship("Goal")
-    related_credit_card = relationship("CreditCard")
+    related_transaction = relationship("Transaction", lazy="raise")
+    related_budget = relationship("Budget", lazy="raise")
+    related_goal = relationship("Goal", lazy="raise")
+    related_credit_card = relationship("CreditCard", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra AlertType y guardar el valor como texto"""
+        return AlertType(value).value
+    
+    @validates("priority")
+    def _validate_priority(self, key, value):
+        """Validar contra AlertPriority y guardar el valor como texto"""
+        return None if value is None else AlertPriority(value).value
+
 
+# Alertas del usuario por estado de lectura, ordenadas por fecha
+Index("ix_alerts_user_read_created", Alert.user_id, Alert.is_read, Alert.created_at)
@@ -1,11 +1,12 @@
 """
 Modelo de Presupuestos
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, Date
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Date, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.database import Base
+from app.models.types import Money
 
 
 class BudgetType(str, enum.Enum):
@@ -29,16 +30,16 @@ class Budget(Base):
     
     __tablename__ = "budgets"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Información básica
     name = Column(String, nullable=False)
-    type = Column(Enum(BudgetType), nullable=False)
+    type = Column(String, nullable=False)
     
     # Configuración
-    limit_amount = Column(Float, nullable=False)
-    period = Column(Enum(BudgetPeriod), nullable=False)
+    limit_amount = Column(Money, nullable=False)
+    period = Column(String, nullable=False)
     start_day = Column(Integer, default=1)  # Día de inicio del periodo
     
     # Rollover
@@ -63,6 +64,19 @@ class Budget(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    category = relationship("Category")
-    account = relationship("Account")
+    category = relationship("Category", lazy="raise")
+    account = relationship("Account", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra BudgetType y guardar el valor como texto"""
+        return BudgetType(value).value
+    
+    @validates("period")
+    def _validate_period(self, key, value):
+        """Validar contra BudgetPeriod y guardar el valor como texto"""
+        return BudgetPeriod(value).value
+
 
+# Filtro habitual: presupuestos activos del usuario
+Index("ix_budgets_user_active", Budget.user_id, Budget.is_active)
@@ -1,9 +1,9 @@
 """
 Modelo de Categorías
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.database import Base
 
@@ -19,13 +19,13 @@ class Category(Base):
     
     __tablename__ = "categories"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True)  # Para subcategorías
     
     # Información básica
     name = Column(String, nullable=False)
-    type = Column(Enum(CategoryType), nullable=False)
+    type = Column(String, nullable=False)
     
     # Personalización
     icon = Column(String, default="category")
@@ -41,6 +41,18 @@ class Category(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    subcategories = relationship("Category", backref="parent", remote_side=[id])
-    transactions = relationship("Transaction", back_populates="category")
+    parent = relationship("Category", remote_side=[id], back_populates="subcategories", lazy="raise")
+    subcategories = relationship("Category", back_populates="parent")
+    transactions = relationship("Transaction", back_populates="category", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra CategoryType y guardar el valor como texto"""
+        return CategoryType(value).value
+
+
+# Filtro habitual: categorías visibles del usuario
+Index("ix_categories_user_hidden", Category.user_id, Category.is_hidden)
 
+# Categorías del usuario por tipo (ingreso/gasto)
+Index("ix_categories_user_type", Category.user_id, Category.type)
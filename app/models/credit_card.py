@@ -1,10 +1,11 @@
 """
 Modelos de Tarjetas de Crédito
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Date, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import Money
 
 
 class CreditCard(Base):
@@ -12,7 +13,7 @@ class CreditCard(Base):
     
     __tablename__ = "credit_cards"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, unique=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
@@ -21,7 +22,7 @@ class CreditCard(Base):
     last_four_digits = Column(String(4), nullable=True)
     
     # Configuración financiera
-    credit_limit = Column(Float, nullable=False)
+    credit_limit = Column(Money, nullable=False)
     cutoff_day = Column(Integer, nullable=False)  # Día de corte (1-28)
     payment_due_day = Column(Integer, nullable=False)  # Día límite de pago
     
@@ -46,9 +47,13 @@ class CreditCard(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    account = relationship("Account")
-    periods = relationship("CreditCardPeriod", back_populates="credit_card")
-    installment_purchases = relationship("InstallmentPurchase", back_populates="credit_card")
+    account = relationship("Account", lazy="raise")
+    periods = relationship("CreditCardPeriod", back_populates="credit_card", lazy="raise")
+    installment_purchases = relationship("InstallmentPurchase", back_populates="credit_card", lazy="raise")
+
+
+# Filtro habitual: tarjetas activas del usuario
+Index("ix_credit_cards_user_active", CreditCard.user_id, CreditCard.is_active)
 
 
 class CreditCardPeriod(Base):
@@ -56,7 +61,7 @@ class CreditCardPeriod(Base):
     
     __tablename__ = "credit_card_periods"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     credit_card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=False)
     
     # Fechas del periodo
@@ -78,7 +83,7 @@ class CreditCardPeriod(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    credit_card = relationship("CreditCard", back_populates="periods")
+    credit_card = relationship("CreditCard", back_populates="periods", lazy="raise")
 
 
 class InstallmentPurchase(Base):
@@ -86,7 +91,7 @@ class InstallmentPurchase(Base):
     
     __tablename__ = "installment_purchases"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     credit_card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
@@ -113,7 +118,7 @@ class InstallmentPurchase(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    credit_card = relationship("CreditCard", back_populates="installment_purchases")
-    category = relationship("Category")
-    transactions = relationship("Transaction", back_populates="installment_purchase")
+    credit_card = relationship("CreditCard", back_populates="installment_purchases", lazy="raise")
+    category = relationship("Category", lazy="raise")
+    transactions = relationship("Transaction", back_populates="installment_purchase", lazy="raise")
 
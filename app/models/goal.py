@@ -1,11 +1,12 @@
 """
 Modelos de Metas Financieras
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, Date, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Date, Text, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.database import Base
+from app.models.types import Money
 
 
 class GoalType(str, enum.Enum):
@@ -28,18 +29,18 @@ class Goal(Base):
     
     __tablename__ = "goals"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Información básica
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    type = Column(Enum(GoalType), nullable=False)
+    type = Column(String, nullable=False)
     
     # Montos
-    target_amount = Column(Float, nullable=False)
+    target_amount = Column(Money, nullable=False)
     initial_amount = Column(Float, default=0.0)
-    current_amount = Column(Float, default=0.0)
+    current_amount = Column(Money, default=0.0)
     
     # Fechas
     target_date = Column(Date, nullable=True)  # Fecha objetivo (opcional)
@@ -50,7 +51,7 @@ class Goal(Base):
     auto_contribution_frequency = Column(String, nullable=True)  # weekly, biweekly, monthly
     
     # Prioridad y personalización
-    priority = Column(Enum(GoalPriority), default=GoalPriority.MEDIUM)
+    priority = Column(String, default=GoalPriority.MEDIUM.value)
     color = Column(String, default="#4CAF50")
     icon = Column(String, default="flag")
     
@@ -64,8 +65,18 @@ class Goal(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    linked_account = relationship("Account")
-    contributions = relationship("GoalContribution", back_populates="goal")
+    linked_account = relationship("Account", lazy="raise")
+    contributions = relationship("GoalContribution", back_populates="goal", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra GoalType y guardar el valor como texto"""
+        return GoalType(value).value
+    
+    @validates("priority")
+    def _validate_priority(self, key, value):
+        """Validar contra GoalPriority y guardar el valor como texto"""
+        return None if value is None else GoalPriority(value).value
 
 
 class GoalContribution(Base):
@@ -73,7 +84,7 @@ class GoalContribution(Base):
     
     __tablename__ = "goal_contributions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     goal_id = Column(Integer, ForeignKey("goals.id"), nullable=False)
     
     amount = Column(Float, nullable=False)
@@ -85,5 +96,11 @@ class GoalContribution(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relaciones
-    goal = relationship("Goal", back_populates="contributions")
+    goal = relationship("Goal", back_populates="contributions", lazy="raise")
+
+
+# Listado de metas del usuario (no archivadas, opcionalmente sin completar)
+Index("ix_goals_user_archived_completed", Goal.user_id, Goal.is_archived, Goal.is_completed)
 
+# Aportaciones recientes por meta
+Index("ix_goal_contributions_goal_date", GoalContribution.goal_id, GoalContribution.date)
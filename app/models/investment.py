@@ -1,11 +1,12 @@
 """
 Modelos de Inversiones
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, Date, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Date, Text, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.database import Base
+from app.models.types import Money
 
 
 class InvestmentType(str, enum.Enum):
@@ -33,13 +34,13 @@ class Investment(Base):
     
     __tablename__ = "investments"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Información del activo
     name = Column(String, nullable=False)
     ticker = Column(String, nullable=True)  # Símbolo (AAPL, BTC, etc.)
-    type = Column(Enum(InvestmentType), nullable=False)
+    type = Column(String, nullable=False)
     
     # Cantidades
     quantity = Column(Float, default=0.0)  # Unidades/acciones
@@ -63,7 +64,12 @@ class Investment(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    transactions = relationship("InvestmentTransaction", back_populates="investment")
+    transactions = relationship("InvestmentTransaction", back_populates="investment", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra InvestmentType y guardar el valor como texto"""
+        return InvestmentType(value).value
 
 
 class InvestmentTransaction(Base):
@@ -71,17 +77,17 @@ class InvestmentTransaction(Base):
     
     __tablename__ = "investment_transactions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     investment_id = Column(Integer, ForeignKey("investments.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Tipo de transacción
-    type = Column(Enum(InvestmentTransactionType), nullable=False)
+    type = Column(String, nullable=False)
     
     # Detalles
     quantity = Column(Float, nullable=True)  # Para compras/ventas
     price_per_unit = Column(Float, nullable=True)
-    total_amount = Column(Float, nullable=False)
+    total_amount = Column(Money, nullable=False)
     
     # Fecha
     date = Column(Date, nullable=False)
@@ -94,5 +100,13 @@ class InvestmentTransaction(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relaciones
-    investment = relationship("Investment", back_populates="transactions")
+    investment = relationship("Investment", back_populates="transactions", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra InvestmentTransactionType y guardar el valor como texto"""
+        return InvestmentTransactionType(value).value
+
 
+# Filtro habitual: inversiones activas del usuario
+Index("ix_investments_user_active", Investment.user_id, Investment.is_active)
@@ -1,10 +1,11 @@
 """
 Modelo de Suscripciones
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Date, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import Money
 
 
 class Subscription(Base):
@@ -12,13 +13,13 @@ class Subscription(Base):
     
     __tablename__ = "subscriptions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     recurring_transaction_id = Column(Integer, ForeignKey("recurring_transactions.id"), nullable=True)
     
     # Información de la suscripción
     name = Column(String, nullable=False)  # Nombre del servicio
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     currency = Column(String, default="MXN")
     frequency = Column(String, default="monthly")  # monthly, annual, weekly, biweekly
     billing_day = Column(Integer, nullable=True)  # Día del mes
@@ -48,7 +49,10 @@ class Subscription(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    category = relationship("Category")
-    account = relationship("Account")
-    recurring_transaction = relationship("RecurringTransaction")
+    category = relationship("Category", lazy="raise")
+    account = relationship("Account", lazy="raise")
+    recurring_transaction = relationship("RecurringTransaction", lazy="raise")
 
+
+# Filtro habitual: suscripciones activas del usuario
+Index("ix_subscriptions_user_active", Subscription.user_id, Subscription.is_active)
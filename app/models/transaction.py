@@ -1,11 +1,12 @@
 """
 Modelos de Transacciones
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.database import Base
+from app.models.types import Money
 
 
 class TransactionType(str, enum.Enum):
@@ -33,14 +34,14 @@ class Transaction(Base):
     
     __tablename__ = "transactions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     
     # Información básica
-    type = Column(Enum(TransactionType), nullable=False)
-    amount = Column(Float, nullable=False)
+    type = Column(String, nullable=False)
+    amount = Column(Money, nullable=False)
     currency = Column(String, default="MXN")
     
     # Fecha y hora
@@ -85,13 +86,20 @@ class Transaction(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    account = relationship("Account", back_populates="transactions", foreign_keys=[account_id])
-    to_account = relationship("Account", foreign_keys=[to_account_id])
-    category = relationship("Category", back_populates="transactions")
-    splits = relationship("TransactionSplit", back_populates="parent_transaction")
-    parent_transaction = relationship("Transaction", remote_side=[id], backref="child_transactions")
-    recurring_transaction = relationship("RecurringTransaction", back_populates="transactions")
-    installment_purchase = relationship("InstallmentPurchase", back_populates="transactions")
+    # Cuenta y categoría se usan al serializar cada transacción (account_name / category_name)
+    account = relationship("Account", back_populates="transactions", foreign_keys=[account_id], lazy="joined")
+    to_account = relationship("Account", foreign_keys=[to_account_id], lazy="raise")
+    category = relationship("Category", back_populates="transactions", lazy="joined")
+    splits = relationship("TransactionSplit", back_populates="parent_transaction", lazy="raise")
+    parent_transaction = relationship("Transaction", remote_side=[id], back_populates="child_transactions", lazy="raise")
+    child_transactions = relationship("Transaction", back_populates="parent_transaction", lazy="raise")
+    recurring_transaction = relationship("RecurringTransaction", back_populates="transactions", lazy="raise")
+    installment_purchase = relationship("InstallmentPurchase", back_populates="transactions", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra TransactionType y guardar el valor como texto"""
+        return TransactionType(value).value
     
     # Propiedades calculadas para serialización
     @property
@@ -105,24 +113,42 @@ class Transaction(Base):
         return self.category.name if self.category else None
 
 
+# Listado y paginación por cursor: transacciones del usuario por (fecha, id) descendente
+Index(
+    "ix_transactions_user_date_id",
+    Transaction.user_id,
+    Transaction.date.desc(),
+    Transaction.id.desc(),
+)
+
+# Listado filtrado por cuenta, con el mismo orden
+Index(
+    "ix_transactions_user_account_date_id",
+    Transaction.user_id,
+    Transaction.account_id,
+    Transaction.date.desc(),
+    Transaction.id.desc(),
+)
+
+
 class TransactionSplit(Base):
     """División de transacción en múltiples categorías"""
     
     __tablename__ = "transaction_splits"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     parent_transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     notes = Column(Text, nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relaciones
-    parent_transaction = relationship("Transaction", back_populates="splits")
-    category = relationship("Category")
+    parent_transaction = relationship("Transaction", back_populates="splits", lazy="raise")
+    category = relationship("Category", lazy="raise")
 
 
 class RecurringTransaction(Base):
@@ -130,19 +156,19 @@ class RecurringTransaction(Base):
     
     __tablename__ = "recurring_transactions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     
     # Información básica
     name = Column(String, nullable=False)
-    type = Column(Enum(TransactionType), nullable=False)
-    amount = Column(Float, nullable=False)
+    type = Column(String, nullable=False)
+    amount = Column(Money, nullable=False)
     is_variable_amount = Column(Boolean, default=False)  # Si el monto varía, notificar antes
     
     # Recurrencia
-    frequency = Column(Enum(RecurrenceFrequency), nullable=False)
+    frequency = Column(String, nullable=False)
     custom_frequency_days = Column(Integer, nullable=True)  # Para CUSTOM
     day_of_month = Column(Integer, nullable=True)  # 1-31 o -1 para último día
     day_of_week = Column(Integer, nullable=True)  # 1-7 para semanal
@@ -168,7 +194,32 @@ class RecurringTransaction(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    account = relationship("Account")
-    category = relationship("Category")
-    transactions = relationship("Transaction", back_populates="recurring_transaction")
+    account = relationship("Account", lazy="raise")
+    category = relationship("Category", lazy="raise")
+    transactions = relationship("Transaction", back_populates="recurring_transaction", lazy="raise")
+    
+    @validates("type")
+    def _validate_type(self, key, value):
+        """Validar contra TransactionType y guardar el valor como texto"""
+        return TransactionType(value).value
+    
+    @validates("frequency")
+    def _validate_frequency(self, key, value):
+        """Validar contra RecurrenceFrequency y guardar el valor como texto"""
+        return RecurrenceFrequency(value).value
+
+
+# Saldos por cuenta: movimientos de la cuenta y traspasos entrantes por tipo
+Index("ix_transactions_account_type", Transaction.account_id, Transaction.type)
+Index("ix_transactions_to_account_type", Transaction.to_account_id, Transaction.type)
+
+# Filtro habitual: transacciones recurrentes activas del usuario
+Index("ix_recurring_transactions_user_active", RecurringTransaction.user_id, RecurringTransaction.is_active)
 
+# Proceso de recurrentes pendientes: índice parcial solo con las activas de creación automática
+Index(
+    "ix_recurring_transactions_auto_pending",
+    RecurringTransaction.id,
+    sqlite_where=(RecurringTransaction.is_active == True) & (RecurringTransaction.auto_create == True),
+    postgresql_where=(RecurringTransaction.is_active == True) & (RecurringTransaction.auto_create == True),
+)
@@ -0,0 +1,19 @@
+"""
+Tipos de columna compartidos por los modelos
+"""
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+
+class Money(TypeDecorator):
+    """Monto guardado como entero en centavos y expuesto como float"""
+    
+    impl = Integer
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else round(value * 100)
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else value / 100
+
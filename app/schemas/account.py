@@ -1,7 +1,7 @@
 """
 Schemas de Cuentas
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from app.models.account import AccountType
@@ -46,6 +46,5 @@ class AccountResponse(AccountBase):
     # Calculado
     current_balance: Optional[float] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
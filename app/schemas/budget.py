@@ -1,7 +1,7 @@
 """
 Schemas de Presupuestos
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from app.models.budget import BudgetType, BudgetPeriod
@@ -65,6 +65,5 @@ class BudgetResponse(BudgetBase):
     percentage_used: Optional[float] = None
     estimated_depletion_date: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
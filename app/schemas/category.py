@@ -1,7 +1,7 @@
 """
 Schemas de Categorías
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from app.models.category import CategoryType
@@ -42,6 +42,11 @@ class CategoryResponse(CategoryBase):
     # Subcategorías
     subcategories: Optional[List["CategoryResponse"]] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+    
+    @field_validator("subcategories", mode="before")
+    @classmethod
+    def _empty_as_none(cls, value):
+        """Sin subcategorías se responde null, igual que en el listado"""
+        return value or None
 
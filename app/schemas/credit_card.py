@@ -1,7 +1,7 @@
 """
 Schemas de Tarjetas de Crédito
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime, date
 
@@ -56,8 +56,7 @@ class CreditCardResponse(CreditCardBase):
     next_cutoff_date: Optional[date] = None
     next_payment_date: Optional[date] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class InstallmentPurchaseCreate(BaseModel):
@@ -91,6 +90,5 @@ class InstallmentPurchaseResponse(BaseModel):
     amount_paid: Optional[float] = None
     amount_remaining: Optional[float] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
@@ -1,7 +1,7 @@
 """
 Schemas de Metas Financieras
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime, date
 from app.models.goal import GoalType, GoalPriority
@@ -64,8 +64,7 @@ class GoalResponse(GoalBase):
     estimated_completion_date: Optional[date] = None
     required_monthly_contribution: Optional[float] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GoalContributionCreate(BaseModel):
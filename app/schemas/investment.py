@@ -1,7 +1,7 @@
 """
 Schemas de Inversiones
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime, date
 from app.models.investment import InvestmentType, InvestmentTransactionType
@@ -55,8 +55,7 @@ class InvestmentResponse(InvestmentBase):
     realized_gain: Optional[float] = None
     total_return: Optional[float] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class InvestmentTransactionCreate(BaseModel):
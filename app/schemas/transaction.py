@@ -1,11 +1,20 @@
 """
 Schemas de Transacciones
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List
 from datetime import datetime, date
 from app.models.transaction import TransactionType, RecurrenceFrequency
 
+# Valor -> miembro de cada enum, para no pasar por la búsqueda genérica de pydantic
+_TRANSACTION_TYPES = {member.value: member for member in TransactionType}
+_FREQUENCIES = {member.value: member for member in RecurrenceFrequency}
+
+
+def _lookup(members: dict, value):
+    """Convertir el valor recibido al miembro del enum si se conoce; si no, dejarlo a pydantic"""
+    return members.get(value, value) if isinstance(value, str) else value
+
 
 class TransactionSplitCreate(BaseModel):
     """Split de transacción"""
@@ -24,6 +33,11 @@ class TransactionBase(BaseModel):
     merchant: Optional[str] = None
     notes: Optional[str] = None
     tags: Optional[str] = None
+    
+    @field_validator("type", mode="before")
+    @classmethod
+    def _fast_type(cls, value):
+        return _lookup(_TRANSACTION_TYPES, value)
 
 
 class TransactionCreate(TransactionBase):
@@ -55,6 +69,11 @@ class TransactionUpdate(BaseModel):
     tags: Optional[str] = None
     is_reimbursable: Optional[bool] = None
     reimbursed: Optional[bool] = None
+    
+    @field_validator("type", mode="before")
+    @classmethod
+    def _fast_type(cls, value):
+        return _lookup(_TRANSACTION_TYPES, value)
 
 
 class TransactionResponse(TransactionBase):
@@ -75,8 +94,7 @@ class TransactionResponse(TransactionBase):
     account_name: Optional[str] = None
     category_name: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RecurringTransactionCreate(BaseModel):
@@ -97,4 +115,14 @@ class RecurringTransactionCreate(BaseModel):
     is_variable_amount: bool = False
     merchant: Optional[str] = None
     notes: Optional[str] = None
+    
+    @field_validator("type", mode="before")
+    @classmethod
+    def _fast_type(cls, value):
+        return _lookup(_TRANSACTION_TYPES, value)
+    
+    @field_validator("frequency", mode="before")
+    @classmethod
+    def _fast_frequency(cls, value):
+        return _lookup(_FREQUENCIES, value)
 
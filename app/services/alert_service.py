@@ -1,17 +1,31 @@
 """
 Servicio de alertas y notificaciones
 """
+from functools import lru_cache
 from typing import List, Optional
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import Row, and_, func, insert, select
 
+from app.database import safe_load
 from app.models.alert import Alert, AlertType, AlertPriority
 from app.models.credit_card import CreditCard
-from app.models.budget import Budget
 from app.models.goal import Goal
 from app.models.transaction import Transaction, TransactionType
-from app.utils.calculations import get_next_cutoff_date
+from app.utils.calculations import day_range, get_next_cutoff_date
+
+# Columnas opcionales de relación: con las mismas claves (y render_nulls) todas las
+# filas de un INSERT masivo van en una sola sentencia
+_EMPTY_RELATED_IDS = dict.fromkeys((
+    "related_transaction_id", "related_budget_id",
+    "related_goal_id", "related_credit_card_id",
+))
+
+
+@lru_cache(maxsize=64)
+def _next_day_of_month(day: int, today: date) -> date:
+    """Próxima fecha de corte o de pago (la fecha de hoy es parte de la clave)"""
+    return get_next_cutoff_date(day, today)
 
 
 class AlertService:
@@ -52,6 +66,14 @@ class AlertService:
         
         return query.order_by(Alert.created_at.desc()).limit(limit).all()
     
+    @staticmethod
+    def count_unread(db: Session, user_id: int) -> int:
+        """Contar alertas no leídas del usuario"""
+        return db.query(func.count(Alert.id)).filter(
+            Alert.user_id == user_id,
+            Alert.is_read == False
+        ).scalar()
+    
     @staticmethod
     def mark_as_read(db: Session, user_id: int, alert_id: int) -> Alert:
         """Marcar alerta como leída"""
@@ -62,7 +84,8 @@ class AlertService:
         
         if alert:
             alert.is_read = True
-            alert.read_at = datetime.now()
+            # Mismo reloj que mark_all_as_read (el de la base de datos)
+            alert.read_at = func.now()
             db.commit()
             db.refresh(alert)
         
@@ -76,171 +99,201 @@ class AlertService:
             Alert.is_read == False
         ).update({
             "is_read": True,
-            "read_at": datetime.now()
-        })
+            # Hora del servidor de base de datos, como created_at
+            "read_at": func.now()
+        }, synchronize_session=False)
+        db.commit()
+    
+    @staticmethod
+    def _existing_alert_keys(db: Session, user_id: int, alert_types: List[AlertType],
+                             related_column, since: Optional[datetime] = None) -> set:
+        """
+        Pares (tipo, id relacionado) de las alertas ya creadas, en una sola consulta
+        en lugar de una por elemento
+        """
+        query = select(Alert.type, related_column).where(
+            Alert.user_id == user_id,
+            Alert.type.in_([alert_type.value for alert_type in alert_types])
+        )
+        if since is not None:
+            query = query.where(Alert.created_at >= since)
+        return set(db.execute(query).all())
+    
+    @staticmethod
+    def create_alerts_bulk(db: Session, rows: List[dict]) -> List[Row]:
+        """
+        Crear varias alertas (diccionarios de columnas) en un solo INSERT multi-fila
+        con RETURNING y un solo commit. create_alert queda para alertas sueltas
+        Retorna: filas con id, title y type de cada alerta creada
+        """
+        if not rows:
+            return []
+        created = db.execute(
+            insert(Alert).returning(Alert.id, Alert.title, Alert.type)
+            .execution_options(render_nulls=True),
+            [{**_EMPTY_RELATED_IDS, **row} for row in rows]
+        ).all()
         db.commit()
+        return created
     
     @staticmethod
     def generate_credit_card_alerts(db: Session, user_id: int):
         """Generar alertas de tarjetas de crédito"""
+        return AlertService.create_alerts_bulk(
+            db, AlertService._credit_card_alert_rows(db, user_id)
+        )
+    
+    @staticmethod
+    def _credit_card_alert_rows(db: Session, user_id: int) -> List[dict]:
+        """Filas de las alertas de tarjetas de crédito que faltan por crear"""
         today = date.today()
         
-        credit_cards = db.query(CreditCard).filter(
+        # Solo se leen columnas de la tarjeta: sin cargas perezosas de relaciones
+        credit_cards = db.query(CreditCard).options(*safe_load()).filter(
             CreditCard.user_id == user_id,
             CreditCard.is_active == True
         ).all()
         
-        alerts_created = []
+        # Alertas del último día de todas las tarjetas
+        existing = AlertService._existing_alert_keys(
+            db, user_id,
+            [AlertType.CREDIT_CARD_CUTOFF, AlertType.CREDIT_CARD_PAYMENT],
+            Alert.related_credit_card_id,
+            since=datetime.now() - timedelta(days=1)
+        )
+        
+        rows = []
         
         for card in credit_cards:
             # Alerta de fecha de corte próxima
-            next_cutoff = get_next_cutoff_date(card.cutoff_day)
+            next_cutoff = _next_day_of_month(card.cutoff_day, today)
             days_to_cutoff = (next_cutoff - today).days
             
-            if days_to_cutoff <= card.alert_days_before_cutoff:
-                # Verificar que no exista alerta reciente
-                existing = db.query(Alert).filter(
-                    Alert.user_id == user_id,
-                    Alert.type == AlertType.CREDIT_CARD_CUTOFF,
-                    Alert.related_credit_card_id == card.id,
-                    Alert.created_at >= datetime.now() - timedelta(days=1)
-                ).first()
-                
-                if not existing:
-                    alert = AlertService.create_alert(
-                        db, user_id,
-                        AlertType.CREDIT_CARD_CUTOFF,
-                        f"Corte próximo: {card.card_name}",
-                        f"Tu tarjeta {card.card_name} cortará en {days_to_cutoff} días ({next_cutoff.strftime('%d/%m')})",
-                        AlertPriority.MEDIUM,
-                        {"credit_card_id": card.id}
-                    )
-                    alerts_created.append(alert)
+            if (days_to_cutoff <= card.alert_days_before_cutoff
+                    and (AlertType.CREDIT_CARD_CUTOFF.value, card.id) not in existing):
+                rows.append({
+                    "user_id": user_id,
+                    "type": AlertType.CREDIT_CARD_CUTOFF.value,
+                    "priority": AlertPriority.MEDIUM.value,
+                    "title": f"Corte próximo: {card.card_name}",
+                    "message": f"Tu tarjeta {card.card_name} cortará en {days_to_cutoff} días ({next_cutoff.strftime('%d/%m')})",
+                    "related_credit_card_id": card.id,
+                })
             
             # Alerta de fecha límite de pago
-            next_payment = get_next_cutoff_date(card.payment_due_day)
+            next_payment = _next_day_of_month(card.payment_due_day, today)
             days_to_payment = (next_payment - today).days
             
-            if days_to_payment <= card.alert_days_before_payment:
-                existing = db.query(Alert).filter(
-                    Alert.user_id == user_id,
-                    Alert.type == AlertType.CREDIT_CARD_PAYMENT,
-                    Alert.related_credit_card_id == card.id,
-                    Alert.created_at >= datetime.now() - timedelta(days=1)
-                ).first()
-                
-                if not existing:
-                    alert = AlertService.create_alert(
-                        db, user_id,
-                        AlertType.CREDIT_CARD_PAYMENT,
-                        f"Pago próximo: {card.card_name}",
-                        f"Tu pago de {card.card_name} vence en {days_to_payment} días ({next_payment.strftime('%d/%m')})",
-                        AlertPriority.HIGH,
-                        {"credit_card_id": card.id}
-                    )
-                    alerts_created.append(alert)
+            if (days_to_payment <= card.alert_days_before_payment
+                    and (AlertType.CREDIT_CARD_PAYMENT.value, card.id) not in existing):
+                rows.append({
+                    "user_id": user_id,
+                    "type": AlertType.CREDIT_CARD_PAYMENT.value,
+                    "priority": AlertPriority.HIGH.value,
+                    "title": f"Pago próximo: {card.card_name}",
+                    "message": f"Tu pago de {card.card_name} vence en {days_to_payment} días ({next_payment.strftime('%d/%m')})",
+                    "related_credit_card_id": card.id,
+                })
         
-        return alerts_created
+        return rows
     
     @staticmethod
     def generate_budget_alerts(db: Session, user_id: int):
         """Generar alertas de presupuestos"""
+        return AlertService.create_alerts_bulk(
+            db, AlertService._budget_alert_rows(db, user_id)
+        )
+    
+    @staticmethod
+    def _budget_alert_rows(db: Session, user_id: int) -> List[dict]:
+        """Filas de las alertas de presupuestos que faltan por crear"""
         from app.services.budget_service import BudgetService
         
-        budgets = db.query(Budget).filter(
-            Budget.user_id == user_id,
-            Budget.is_active == True
-        ).all()
+        existing = AlertService._existing_alert_keys(
+            db, user_id,
+            [AlertType.BUDGET_WARNING, AlertType.BUDGET_EXCEEDED],
+            Alert.related_budget_id,
+            since=datetime.now() - timedelta(days=1)
+        )
         
-        alerts_created = []
+        rows = []
         
-        for budget in budgets:
-            budget_info = BudgetService.get_budget_with_calculations(db, user_id, budget.id)
+        # Gasto de todos los presupuestos activos en una sola consulta
+        for budget_info in BudgetService.get_budgets_with_calculations(db, user_id):
+            budget = budget_info["budget"]
             percentage = budget_info["percentage_used"]
             
             # Alerta al alcanzar umbral
             if percentage >= budget.alert_at_percentage and percentage < 100:
-                existing = db.query(Alert).filter(
-                    Alert.user_id == user_id,
-                    Alert.type == AlertType.BUDGET_WARNING,
-                    Alert.related_budget_id == budget.id,
-                    Alert.created_at >= datetime.now() - timedelta(days=1)
-                ).first()
-                
-                if not existing:
-                    alert = AlertService.create_alert(
-                        db, user_id,
-                        AlertType.BUDGET_WARNING,
-                        f"Presupuesto al {int(percentage)}%",
-                        f"Tu presupuesto '{budget.name}' está al {int(percentage)}% de uso",
-                        AlertPriority.MEDIUM,
-                        {"budget_id": budget.id}
-                    )
-                    alerts_created.append(alert)
+                if (AlertType.BUDGET_WARNING.value, budget.id) not in existing:
+                    rows.append({
+                        "user_id": user_id,
+                        "type": AlertType.BUDGET_WARNING.value,
+                        "priority": AlertPriority.MEDIUM.value,
+                        "title": f"Presupuesto al {int(percentage)}%",
+                        "message": f"Tu presupuesto '{budget.name}' está al {int(percentage)}% de uso",
+                        "related_budget_id": budget.id,
+                    })
             
             # Alerta si excede
             elif percentage >= 100 and budget.alert_on_exceed:
-                existing = db.query(Alert).filter(
-                    Alert.user_id == user_id,
-                    Alert.type == AlertType.BUDGET_EXCEEDED,
-                    Alert.related_budget_id == budget.id,
-                    Alert.created_at >= datetime.now() - timedelta(days=1)
-                ).first()
-                
-                if not existing:
-                    alert = AlertService.create_alert(
-                        db, user_id,
-                        AlertType.BUDGET_EXCEEDED,
-                        f"Presupuesto excedido",
-                        f"Tu presupuesto '{budget.name}' ha sido excedido ({int(percentage)}%)",
-                        AlertPriority.HIGH,
-                        {"budget_id": budget.id}
-                    )
-                    alerts_created.append(alert)
+                if (AlertType.BUDGET_EXCEEDED.value, budget.id) not in existing:
+                    rows.append({
+                        "user_id": user_id,
+                        "type": AlertType.BUDGET_EXCEEDED.value,
+                        "priority": AlertPriority.HIGH.value,
+                        "title": f"Presupuesto excedido",
+                        "message": f"Tu presupuesto '{budget.name}' ha sido excedido ({int(percentage)}%)",
+                        "related_budget_id": budget.id,
+                    })
         
-        return alerts_created
+        return rows
     
     @staticmethod
     def generate_goal_alerts(db: Session, user_id: int):
         """Generar alertas de metas completadas"""
-        goals = db.query(Goal).filter(
+        return AlertService.create_alerts_bulk(
+            db, AlertService._goal_alert_rows(db, user_id)
+        )
+    
+    @staticmethod
+    def _goal_alert_rows(db: Session, user_id: int) -> List[dict]:
+        """Filas de las alertas de metas completadas que faltan por crear"""
+        goals = db.query(Goal).options(*safe_load()).filter(
             Goal.user_id == user_id,
             Goal.is_completed == True,
             Goal.is_archived == False
         ).all()
         
-        alerts_created = []
+        # Una meta completada se notifica una sola vez
+        existing = AlertService._existing_alert_keys(
+            db, user_id, [AlertType.GOAL_COMPLETED], Alert.related_goal_id
+        )
         
-        for goal in goals:
-            existing = db.query(Alert).filter(
-                Alert.user_id == user_id,
-                Alert.type == AlertType.GOAL_COMPLETED,
-                Alert.related_goal_id == goal.id
-            ).first()
-            
-            if not existing:
-                alert = AlertService.create_alert(
-                    db, user_id,
-                    AlertType.GOAL_COMPLETED,
-                    f"¡Meta completada!",
-                    f"Felicidades, completaste tu meta '{goal.name}'",
-                    AlertPriority.LOW,
-                    {"goal_id": goal.id}
-                )
-                alerts_created.append(alert)
+        rows = [
+            {
+                "user_id": user_id,
+                "type": AlertType.GOAL_COMPLETED.value,
+                "priority": AlertPriority.LOW.value,
+                "title": f"¡Meta completada!",
+                "message": f"Felicidades, completaste tu meta '{goal.name}'",
+                "related_goal_id": goal.id,
+            }
+            for goal in goals
+            if (AlertType.GOAL_COMPLETED.value, goal.id) not in existing
+        ]
         
-        return alerts_created
+        return rows
     
     @staticmethod
     def check_no_transactions_today(db: Session, user_id: int) -> Optional[Alert]:
         """Verificar si no hay transacciones hoy"""
-        today_start = datetime.combine(date.today(), datetime.min.time())
-        today_end = datetime.combine(date.today(), datetime.max.time())
+        today_start, tomorrow_start = day_range(date.today(), date.today())
         
         transactions_today = db.query(Transaction).filter(
             Transaction.user_id == user_id,
             Transaction.date >= today_start,
-            Transaction.date <= today_end
+            Transaction.date < tomorrow_start
         ).count()
         
         if transactions_today == 0:
@@ -262,13 +315,14 @@ class AlertService:
         return None
     
     @staticmethod
-    def generate_all_alerts(db: Session, user_id: int) -> List[Alert]:
+    def generate_all_alerts(db: Session, user_id: int) -> List[Row]:
         """Generar todas las alertas pendientes"""
-        alerts = []
+        # Las alertas de todos los tipos se insertan juntas
+        rows = []
         
-        alerts.extend(AlertService.generate_credit_card_alerts(db, user_id))
-        alerts.extend(AlertService.generate_budget_alerts(db, user_id))
-        alerts.extend(AlertService.generate_goal_alerts(db, user_id))
+        rows.extend(AlertService._credit_card_alert_rows(db, user_id))
+        rows.extend(AlertService._budget_alert_rows(db, user_id))
+        rows.extend(AlertService._goal_alert_rows(db, user_id))
         
-        return alerts
+        return AlertService.create_alerts_bulk(db, rows)
 
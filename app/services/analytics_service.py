@@ -4,40 +4,43 @@ Servicio de análisis y reportes
 from typing import List, Dict
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import case, func, extract
 from collections import defaultdict
 
 from app.models.transaction import Transaction, TransactionType
 from app.models.category import Category
 from app.models.account import Account
 from app.models.investment import Investment
-from app.models.budget import Budget
 from app.models.goal import Goal
-from app.utils.calculations import calculate_net_worth, calculate_investment_return
+from app.utils.calculations import calculate_net_worth, calculate_investment_return, day_range
 
 
 class AnalyticsService:
     """Servicio para análisis y reportes financieros"""
     
+    @staticmethod
+    def _income_expense_totals(db: Session, user_id: int, *date_filters):
+        """Total de ingresos y de gastos del periodo en un solo recorrido"""
+        incomes, expenses = db.query(
+            func.sum(case((Transaction.type == TransactionType.INCOME, Transaction.amount), else_=0)),
+            func.sum(case((Transaction.type == TransactionType.EXPENSE, Transaction.amount), else_=0))
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.type.in_([TransactionType.INCOME, TransactionType.EXPENSE]),
+            *date_filters
+        ).one()
+        return incomes or 0, expenses or 0
+    
     @staticmethod
     def get_dashboard_summary(db: Session, user_id: int) -> Dict:
         """Obtener resumen para dashboard"""
         today = date.today()
         first_day_month = date(today.year, today.month, 1)
         
-        # Ingresos del mes
-        incomes = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.INCOME,
-            Transaction.date >= first_day_month
-        ).scalar() or 0
-        
-        # Gastos del mes
-        expenses = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= first_day_month
-        ).scalar() or 0
+        # Ingresos y gastos del mes
+        incomes, expenses = AnalyticsService._income_expense_totals(
+            db, user_id, Transaction.date >= first_day_month
+        )
         
         # Balance del mes
         balance = incomes - expenses
@@ -49,13 +52,10 @@ class AnalyticsService:
             Account.type.in_(["cash", "debit", "savings"])
         ).all()
         
-        # Aquí deberíamos calcular el saldo de cada cuenta,
-        # por simplicidad usamos el servicio de transacciones
+        # Saldos de todas las cuentas en una sola consulta agregada
         from app.services.transaction_service import TransactionService
-        total_balance = sum(
-            TransactionService.get_account_balance(db, user_id, acc.id)
-            for acc in accounts
-        )
+        balances = TransactionService.get_balances_for_user(db, user_id)
+        total_balance = sum(balances[acc.id] for acc in accounts)
         
         # Top 5 categorías del mes
         top_categories = db.query(
@@ -82,6 +82,7 @@ class AnalyticsService:
     def get_expense_by_category(db: Session, user_id: int, 
                                 start_date: date, end_date: date) -> List[Dict]:
         """Obtener gastos agrupados por categoría"""
+        range_start, range_end = day_range(start_date, end_date)
         results = db.query(
             Category.id,
             Category.name,
@@ -92,8 +93,8 @@ class AnalyticsService:
         ).join(Transaction).filter(
             Transaction.user_id == user_id,
             Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
+            Transaction.date >= range_start,
+            Transaction.date < range_end
         ).group_by(Category.id).order_by(func.sum(Transaction.amount).desc()).all()
         
         total = sum(r.total for r in results)
@@ -162,28 +163,24 @@ class AnalyticsService:
         """Detectar gastos hormiga (pequeños gastos frecuentes)"""
         start_date = date.today() - timedelta(days=days)
         
-        small_expenses = db.query(Transaction).filter(
+        # Conteo y total por categoría en una sola consulta agregada
+        category_name = func.coalesce(Category.name, "Sin categoría").label("category")
+        total = func.sum(Transaction.amount).label("total")
+        by_category = db.query(
+            category_name,
+            func.count(Transaction.id),
+            total
+        ).outerjoin(
+            Category, Category.id == Transaction.category_id
+        ).filter(
             Transaction.user_id == user_id,
             Transaction.type == TransactionType.EXPENSE,
             Transaction.amount <= threshold,
             Transaction.date >= start_date
-        ).all()
+        ).group_by(category_name).order_by(total.desc()).all()
         
-        # Agrupar por categoría
-        by_category = defaultdict(lambda: {"count": 0, "total": 0})
-        
-        for exp in small_expenses:
-            if exp.category_id:
-                category = db.query(Category).get(exp.category_id)
-                cat_name = category.name if category else "Sin categoría"
-            else:
-                cat_name = "Sin categoría"
-            
-            by_category[cat_name]["count"] += 1
-            by_category[cat_name]["total"] += exp.amount
-        
-        total_amount = sum(exp.amount for exp in small_expenses)
-        total_count = len(small_expenses)
+        total_amount = sum(row[2] for row in by_category)
+        total_count = sum(row[1] for row in by_category)
         
         return {
             "period_days": days,
@@ -192,9 +189,8 @@ class AnalyticsService:
             "transaction_count": total_count,
             "average_amount": total_amount / total_count if total_count > 0 else 0,
             "by_category": [
-                {"category": cat, "count": data["count"], "total": data["total"]}
-                for cat, data in sorted(by_category.items(), 
-                                       key=lambda x: x[1]["total"], reverse=True)
+                {"category": cat, "count": count, "total": cat_total}
+                for cat, count, cat_total in by_category
             ],
             "potential_monthly_savings": total_amount * (30 / days) * 0.5,  # 50% de reducción
         }
@@ -211,10 +207,9 @@ class AnalyticsService:
             Account.type.in_(["cash", "debit", "savings"])
         ).all()
         
-        total_assets = sum(
-            TransactionService.get_account_balance(db, user_id, acc.id)
-            for acc in asset_accounts
-        )
+        # Saldos de todas las cuentas (activos y pasivos) en una sola consulta agregada
+        balances = TransactionService.get_balances_for_user(db, user_id)
+        total_assets = sum(balances[acc.id] for acc in asset_accounts)
         
         # Inversiones
         investments = db.query(Investment).filter(
@@ -238,7 +233,7 @@ class AnalyticsService:
         
         total_liabilities = 0
         for acc in liability_accounts:
-            balance = TransactionService.get_account_balance(db, user_id, acc.id)
+            balance = balances[acc.id]
             # Para cuentas pasivas, el balance negativo es deuda positiva
             total_liabilities += abs(balance) if balance < 0 else balance
         
@@ -262,36 +257,19 @@ class AnalyticsService:
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         
         # Resumen general
-        incomes = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.INCOME,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).scalar() or 0
-        
-        expenses = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).scalar() or 0
+        range_start, range_end = day_range(start_date, end_date)
+        incomes, expenses = AnalyticsService._income_expense_totals(
+            db, user_id, Transaction.date >= range_start, Transaction.date < range_end
+        )
         
         # Gastos por categoría
         by_category = AnalyticsService.get_expense_by_category(
             db, user_id, start_date, end_date
         )
         
-        # Estado de presupuestos
-        budgets = db.query(Budget).filter(
-            Budget.user_id == user_id,
-            Budget.is_active == True
-        ).all()
-        
+        # Estado de presupuestos (una sola consulta de gasto para todos)
         from app.services.budget_service import BudgetService
-        budget_status = [
-            BudgetService.get_budget_with_calculations(db, user_id, b.id)
-            for b in budgets
-        ]
+        budget_status = BudgetService.get_budgets_with_calculations(db, user_id)
         
         # Progreso de metas
         goals = db.query(Goal).filter(
@@ -3,13 +3,14 @@ Servicio de presupuestos
 """
 from typing import List, Dict
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import and_, case, func
 from fastapi import HTTPException
 
 from app.models.budget import Budget, BudgetType, BudgetPeriod
 from app.models.transaction import Transaction, TransactionType
 from app.schemas.budget import BudgetCreate, BudgetUpdate
-from app.utils.calculations import calculate_budget_progress, estimate_budget_depletion_date
+from app.utils.calculations import calculate_budget_progress, day_range, estimate_budget_depletion_date
 from dateutil.relativedelta import relativedelta
 
 
@@ -52,49 +53,84 @@ class BudgetService:
         if not budget:
             raise HTTPException(status_code=404, detail="Presupuesto no encontrado")
         
-        # Calcular periodo actual
-        start_date, end_date = BudgetService._get_period_dates(budget)
-        
-        # Obtener transacciones que aplican a este presupuesto
-        transactions = BudgetService._get_budget_transactions(db, user_id, budget, start_date, end_date)
-        
-        # Calcular gasto
-        spent = sum(t.amount for t in transactions)
-        
-        # Aplicar rollover si está habilitado
-        effective_limit = budget.limit_amount
-        if budget.enable_rollover and budget.current_rollover > 0:
-            effective_limit += budget.current_rollover
+        return BudgetService._calculate_budgets(db, user_id, [budget])[0]
+    
+    @staticmethod
+    def get_budgets_with_calculations(db: Session, user_id: int) -> List[Dict]:
+        """Obtener presupuestos activos del usuario con sus cálculos"""
+        budgets = db.query(Budget).options(raiseload("*")).filter(
+            Budget.user_id == user_id,
+            Budget.is_active == True
+        ).all()
+        
+        return BudgetService._calculate_budgets(db, user_id, budgets)
+    
+    @staticmethod
+    def _calculate_budgets(db: Session, user_id: int, budgets: List[Budget]) -> List[Dict]:
+        """Calcular varios presupuestos con una sola consulta de gasto"""
+        if not budgets:
+            return []
+        
+        # Calcular periodo actual de cada presupuesto
+        periods = [BudgetService._get_period_dates(budget) for budget in budgets]
+        
+        # Sumar el gasto de cada presupuesto como una columna de la misma consulta
+        spent_columns = [
+            func.coalesce(func.sum(case(
+                (BudgetService._budget_filter(budget, start_date, end_date), Transaction.amount),
+                else_=0
+            )), 0)
+            for budget, (start_date, end_date) in zip(budgets, periods)
+        ]
+        range_start, range_end = day_range(
+            min(start for start, _ in periods), max(end for _, end in periods)
+        )
+        spent_row = db.query(*spent_columns).filter(
+            Transaction.user_id == user_id,
+            Transaction.type == TransactionType.EXPENSE,
+            Transaction.date >= range_start,
+            Transaction.date < range_end
+        ).one()
+        
+        today = datetime.now().date()
+        result = []
+        for budget, (start_date, end_date), spent in zip(budgets, periods, spent_row):
+            # Aplicar rollover si está habilitado
+            effective_limit = budget.limit_amount
+            if budget.enable_rollover and budget.current_rollover > 0:
+                effective_limit += budget.current_rollover
+                
+                if budget.rollover_max_accumulation:
+                    effective_limit = min(effective_limit, 
+                                        budget.limit_amount + budget.rollover_max_accumulation)
             
-            if budget.rollover_max_accumulation:
-                effective_limit = min(effective_limit, 
-                                    budget.limit_amount + budget.rollover_max_accumulation)
-        
-        remaining = effective_limit - spent
-        percentage_used = calculate_budget_progress(spent, effective_limit)
-        
-        # Estimar fecha de agotamiento
-        days_elapsed = (datetime.now().date() - start_date).days + 1
-        total_days = (end_date - start_date).days + 1
-        
-        depletion_date = None
-        if spent > 0 and remaining > 0:
-            depletion_date = estimate_budget_depletion_date(
-                spent, effective_limit, days_elapsed, total_days
-            )
-        
-        return {
-            "budget": budget,
-            "period_start": start_date,
-            "period_end": end_date,
-            "spent": spent,
-            "limit": effective_limit,
-            "remaining": remaining,
-            "percentage_used": percentage_used,
-            "estimated_depletion_date": depletion_date,
-            "days_remaining": (end_date - datetime.now().date()).days,
-            "status": BudgetService._get_budget_status(percentage_used),
-        }
+            remaining = effective_limit - spent
+            percentage_used = calculate_budget_progress(spent, effective_limit)
+            
+            # Estimar fecha de agotamiento
+            days_elapsed = (today - start_date).days + 1
+            total_days = (end_date - start_date).days + 1
+            
+            depletion_date = None
+            if spent > 0 and remaining > 0:
+                depletion_date = estimate_budget_depletion_date(
+                    spent, effective_limit, days_elapsed, total_days
+                )
+            
+            result.append({
+                "budget": budget,
+                "period_start": start_date,
+                "period_end": end_date,
+                "spent": spent,
+                "limit": effective_limit,
+                "remaining": remaining,
+                "percentage_used": percentage_used,
+                "estimated_depletion_date": depletion_date,
+                "days_remaining": (end_date - today).days,
+                "status": BudgetService._get_budget_status(percentage_used),
+            })
+        
+        return result
     
     @staticmethod
     def _get_period_dates(budget: Budget) -> tuple:
@@ -144,29 +180,27 @@ class BudgetService:
         return start_date, end_date
     
     @staticmethod
-    def _get_budget_transactions(db: Session, user_id: int, budget: Budget,
-                                 start_date: date, end_date: date) -> List[Transaction]:
-        """Obtener transacciones que aplican a un presupuesto"""
-        query = db.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        )
+    def _budget_filter(budget: Budget, start_date: date, end_date: date):
+        """Condición SQL de las transacciones que aplican a un presupuesto"""
+        range_start, range_end = day_range(start_date, end_date)
+        conditions = [
+            Transaction.date >= range_start,
+            Transaction.date < range_end
+        ]
         
         if budget.type == BudgetType.CATEGORY:
-            query = query.filter(Transaction.category_id == budget.category_id)
+            conditions.append(Transaction.category_id == budget.category_id)
         
         elif budget.type == BudgetType.ACCOUNT:
-            query = query.filter(Transaction.account_id == budget.account_id)
+            conditions.append(Transaction.account_id == budget.account_id)
         
         elif budget.type == BudgetType.TAG:
             # Buscar en tags (campo JSON string)
-            query = query.filter(Transaction.tags.contains(budget.tag))
+            conditions.append(Transaction.tags.contains(budget.tag))
         
         # BudgetType.GLOBAL incluye todas las transacciones
         
-        return query.all()
+        return and_(*conditions)
     
     @staticmethod
     def _get_budget_status(percentage: float) -> str:
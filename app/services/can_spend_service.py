@@ -15,6 +15,7 @@ from app.services.budget_service import BudgetService
 from app.services.goal_service import GoalService
 from app.services.credit_card_service import CreditCardService
 from app.utils.calculations import get_next_cutoff_date
+from app.utils import cache
 
 
 class CanSpendService:
@@ -36,28 +37,11 @@ class CanSpendService:
         warnings = []
         impacts = []
         
-        # 1. Calcular saldo disponible actual
-        accounts = db.query(Account).filter(
-            Account.user_id == user_id,
-            Account.is_archived == False,
-            Account.type.in_(["cash", "debit", "savings"])
-        ).all()
-        
-        total_liquid = sum(
-            TransactionService.get_account_balance(db, user_id, acc.id)
-            for acc in accounts
-        )
-        
-        # 2. Calcular obligaciones próximas (15 días)
-        upcoming_obligations = CanSpendService._get_upcoming_obligations(db, user_id)
-        
-        # 3. Calcular dinero apartado en metas
-        goals = db.query(Goal).filter(
-            Goal.user_id == user_id,
-            Goal.is_completed == False,
-            Goal.is_archived == False
-        ).all()
-        money_in_goals = sum(g.current_amount for g in goals)
+        # 1-3. Saldo líquido, obligaciones próximas y dinero en metas
+        state = CanSpendService.get_spending_state(db, user_id)
+        total_liquid = state["total_liquid"]
+        upcoming_obligations = state["upcoming_obligations"]
+        money_in_goals = state["money_in_goals"]
         
         # 4. Calcular saldo disponible real
         available = total_liquid - upcoming_obligations - money_in_goals
@@ -111,6 +95,43 @@ class CanSpendService:
             "recommendation": recommendation,
         }
     
+    @staticmethod
+    def get_spending_state(db: Session, user_id: int) -> Dict:
+        """
+        Obtener saldo líquido, obligaciones próximas y dinero en metas.
+        Se guarda en caché por usuario y se invalida con cualquier escritura suya.
+        """
+        return cache.get_or_set(
+            user_id, ("spending-state", date.today()),
+            lambda: CanSpendService._calculate_spending_state(db, user_id),
+            ttl=cache.SHORT_TTL
+        )
+    
+    @staticmethod
+    def _calculate_spending_state(db: Session, user_id: int) -> Dict:
+        """Calcular los valores base del análisis de gasto"""
+        # Calcular saldo disponible actual
+        accounts = db.query(Account).filter(
+            Account.user_id == user_id,
+            Account.is_archived == False,
+            Account.type.in_(["cash", "debit", "savings"])
+        ).all()
+        
+        balances = TransactionService.get_balances_for_user(db, user_id)
+        total_liquid = sum(balances[acc.id] for acc in accounts)
+        
+        # Calcular obligaciones próximas (15 días)
+        upcoming_obligations = CanSpendService._get_upcoming_obligations(db, user_id)
+        
+        # Calcular dinero apartado en metas
+        money_in_goals = GoalService.get_total_allocated(db, user_id)
+        
+        return {
+            "total_liquid": total_liquid,
+            "upcoming_obligations": upcoming_obligations,
+            "money_in_goals": money_in_goals,
+        }
+    
     @staticmethod
     def _get_upcoming_obligations(db: Session, user_id: int, days: int = 15) -> float:
         """Obtener obligaciones próximas"""
@@ -3,16 +3,17 @@ Servicio de tarjetas de crédito
 """
 from typing import List, Optional, Dict
 from datetime import datetime, date
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from collections import defaultdict
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import and_, case, func
 from fastapi import HTTPException
 
 from app.models.credit_card import CreditCard, CreditCardPeriod, InstallmentPurchase
 from app.models.transaction import Transaction, TransactionType
-from app.models.account import Account
+from app.models.account import Account, AccountType
 from app.schemas.credit_card import CreditCardCreate, CreditCardUpdate
 from app.utils.calculations import (
-    get_next_cutoff_date, get_period_dates,
+    get_next_cutoff_date, get_period_dates, day_range,
     calculate_credit_available, calculate_minimum_payment
 )
 
@@ -33,7 +34,7 @@ class CreditCardService:
             raise HTTPException(status_code=404, detail="Cuenta no encontrada")
         
         # Validar que la cuenta es de tipo crédito
-        if account.type.value != "credit":
+        if account.type != AccountType.CREDIT:
             raise HTTPException(
                 status_code=400,
                 detail="La cuenta debe ser de tipo crédito"
@@ -83,76 +84,132 @@ class CreditCardService:
         if not credit_card:
             raise HTTPException(status_code=404, detail="Tarjeta no encontrada")
         
-        # Obtener periodos (fechas de corte)
-        # Usar get_closed_period_dates para obtener el periodo que ya cerró y está por pagarse
-        from app.utils.calculations import get_closed_period_dates
-        start_date, cutoff_date = get_closed_period_dates(credit_card.cutoff_day)
-        
-        # Calcular saldo al corte (transacciones entre fechas del periodo CERRADO)
-        # Ejemplo: Si hoy es 26 nov y corte es 15, esto busca gastos del 16 oct al 15 nov
-        cutoff_transactions = db.query(Transaction).filter(
-            Transaction.account_id == credit_card.account_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= start_date,
-            Transaction.date <= cutoff_date
+        return CreditCardService._calculate_cards(db, [credit_card])[0]
+    
+    @staticmethod
+    def get_cards_with_calculations(db: Session, user_id: int) -> List[Dict]:
+        """Obtener todas las tarjetas activas del usuario con sus cálculos"""
+        credit_cards = db.query(CreditCard).options(raiseload("*")).filter(
+            CreditCard.user_id == user_id,
+            CreditCard.is_active == True
         ).all()
         
-        balance_at_cutoff = sum(t.amount for t in cutoff_transactions)
-        
-        # Calcular saldo post-corte (después de la fecha de corte)
-        post_cutoff_transactions = db.query(Transaction).filter(
-            Transaction.account_id == credit_card.account_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date > cutoff_date
-        ).all()
+        return CreditCardService._calculate_cards(db, credit_cards)
+    
+    @staticmethod
+    def _calculate_cards(db: Session, credit_cards: List[CreditCard]) -> List[Dict]:
+        """
+        Calcular saldos de varias tarjetas a la vez.
+        Usa una consulta por relación (transacciones, MSI, cuotas) en lugar de
+        repetirlas por cada tarjeta.
+        """
+        if not credit_cards:
+            return []
         
-        post_cutoff_balance = sum(t.amount for t in post_cutoff_transactions)
+        # Obtener periodos (fechas de corte)
+        # Usar get_closed_period_dates para obtener el periodo que ya cerró y está por pagarse
+        # Ejemplo: Si hoy es 26 nov y corte es 15, el periodo cerrado va del 16 oct al 15 nov
+        from app.utils.calculations import get_closed_period_dates
+        periods = {
+            card.id: get_closed_period_dates(card.cutoff_day)
+            for card in credit_cards
+        }
         
-        # Calcular deuda total de MSI
+        # Clasificar cada gasto como "al corte" o "post-corte" según el periodo de su tarjeta
+        # y sumar por cuenta en una sola consulta
+        bucket_whens = []
+        for card in credit_cards:
+            # Días completos: los gastos del día de corte entran al periodo cerrado
+            range_start, range_end = day_range(*periods[card.id])
+            bucket_whens.append((
+                and_(
+                    Transaction.account_id == card.account_id,
+                    Transaction.date >= range_start,
+                    Transaction.date < range_end
+                ),
+                "cutoff"
+            ))
+            bucket_whens.append((
+                and_(
+                    Transaction.account_id == card.account_id,
+                    Transaction.date >= range_end
+                ),
+                "post_cutoff"
+            ))
+        bucket = case(*bucket_whens, else_=None).label("bucket")
+        
+        expense_rows = db.query(
+            Transaction.account_id,
+            bucket,
+            func.sum(Transaction.amount)
+        ).filter(
+            Transaction.account_id.in_([card.account_id for card in credit_cards]),
+            Transaction.type == TransactionType.EXPENSE
+        ).group_by(Transaction.account_id, bucket).all()
+        
+        sums = {(account_id, kind): total for account_id, kind, total in expense_rows}
+        
+        # Compras a MSI activas de todas las tarjetas
         active_installments = db.query(InstallmentPurchase).filter(
-            InstallmentPurchase.credit_card_id == credit_card.id,
+            InstallmentPurchase.credit_card_id.in_([card.id for card in credit_cards]),
             InstallmentPurchase.is_active == True,
             InstallmentPurchase.completed == False
         ).all()
         
-        total_installment_debt = sum(
-            inst.total_amount - (inst.installment_amount * 
-            db.query(Transaction).filter(
-                Transaction.installment_purchase_id == inst.id
-            ).count())
-            for inst in active_installments
-        )
-        
-        # Calcular crédito disponible
-        available_credit = calculate_credit_available(
-            credit_card.credit_limit,
-            balance_at_cutoff,
-            post_cutoff_balance,
-            total_installment_debt
-        )
-        
-        # Calcular pago mínimo
-        minimum_payment = calculate_minimum_payment(
-            balance_at_cutoff,
-            credit_card.minimum_payment_percentage
-        )
+        # Cuotas registradas por compra a MSI
+        installment_counts = {}
+        if active_installments:
+            installment_counts = dict(db.query(
+                Transaction.installment_purchase_id,
+                func.count(Transaction.id)
+            ).filter(
+                Transaction.installment_purchase_id.in_([inst.id for inst in active_installments])
+            ).group_by(Transaction.installment_purchase_id).all())
+        
+        installment_debt = defaultdict(float)
+        for inst in active_installments:
+            installment_debt[inst.credit_card_id] += (
+                inst.total_amount - inst.installment_amount * installment_counts.get(inst.id, 0)
+            )
         
-        # Próximas fechas
-        next_cutoff = get_next_cutoff_date(credit_card.cutoff_day)
-        next_payment = get_next_cutoff_date(credit_card.payment_due_day)
+        result = []
+        for credit_card in credit_cards:
+            balance_at_cutoff = sums.get((credit_card.account_id, "cutoff")) or 0
+            post_cutoff_balance = sums.get((credit_card.account_id, "post_cutoff")) or 0
+            total_installment_debt = installment_debt.get(credit_card.id, 0)
+            
+            # Calcular crédito disponible
+            available_credit = calculate_credit_available(
+                credit_card.credit_limit,
+                balance_at_cutoff,
+                post_cutoff_balance,
+                total_installment_debt
+            )
+            
+            # Calcular pago mínimo
+            minimum_payment = calculate_minimum_payment(
+                balance_at_cutoff,
+                credit_card.minimum_payment_percentage
+            )
+            
+            # Próximas fechas
+            next_cutoff = get_next_cutoff_date(credit_card.cutoff_day)
+            next_payment = get_next_cutoff_date(credit_card.payment_due_day)
+            
+            result.append({
+                "credit_card": credit_card,
+                "balance_at_cutoff": balance_at_cutoff,
+                "post_cutoff_balance": post_cutoff_balance,
+                "current_balance": balance_at_cutoff + post_cutoff_balance,
+                "available_credit": available_credit,
+                "minimum_payment": minimum_payment,
+                "total_installment_debt": total_installment_debt,
+                "next_cutoff_date": next_cutoff,
+                "next_payment_date": next_payment,
+                "usage_percentage": (balance_at_cutoff + post_cutoff_balance) / credit_card.credit_limit * 100,
+            })
         
-        return {
-            "credit_card": credit_card,
-            "balance_at_cutoff": balance_at_cutoff,
-            "post_cutoff_balance": post_cutoff_balance,
-            "current_balance": balance_at_cutoff + post_cutoff_balance,
-            "available_credit": available_credit,
-            "minimum_payment": minimum_payment,
-            "total_installment_debt": total_installment_debt,
-            "next_cutoff_date": next_cutoff,
-            "next_payment_date": next_payment,
-            "usage_percentage": (balance_at_cutoff + post_cutoff_balance) / credit_card.credit_limit * 100,
-        }
+        return result
     
     @staticmethod
     def get_installment_purchases(db: Session, user_id: int, 
@@ -1,11 +1,13 @@
 """
 Servicio de metas financieras
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, date
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from fastapi import HTTPException
 
+from app.database import safe_load
 from app.models.goal import Goal, GoalContribution, GoalType
 from app.schemas.goal import GoalCreate, GoalUpdate, GoalContributionCreate
 from app.utils.calculations import calculate_goal_progress, project_goal_completion
@@ -59,20 +61,53 @@ class GoalService:
         if not goal:
             raise HTTPException(status_code=404, detail="Meta no encontrada")
         
+        return GoalService._calculate_goals(db, [goal])[0]
+    
+    @staticmethod
+    def get_goals_with_calculations(db: Session, user_id: int,
+                                    include_completed: bool = False) -> List[Dict]:
+        """Obtener metas del usuario con sus cálculos"""
+        query = db.query(Goal).options(*safe_load()).filter(
+            Goal.user_id == user_id,
+            Goal.is_archived == False
+        )
+        
+        if not include_completed:
+            query = query.filter(Goal.is_completed == False)
+        
+        return GoalService._calculate_goals(db, query.all())
+    
+    @staticmethod
+    def _calculate_goals(db: Session, goals: List[Goal]) -> List[Dict]:
+        """Calcular varias metas con una sola consulta de aportaciones"""
+        if not goals:
+            return []
+        
+        # Sumar aportaciones de últimos 3 meses de todas las metas a la vez
+        three_months_ago = datetime.now() - relativedelta(months=3)
+        recent_totals = dict(db.query(
+            GoalContribution.goal_id,
+            func.sum(GoalContribution.amount)
+        ).filter(
+            GoalContribution.goal_id.in_([goal.id for goal in goals]),
+            GoalContribution.date >= three_months_ago
+        ).group_by(GoalContribution.goal_id).all())
+        
+        return [
+            GoalService._goal_calculations(goal, recent_totals.get(goal.id))
+            for goal in goals
+        ]
+    
+    @staticmethod
+    def _goal_calculations(goal: Goal, recent_total: Optional[float]) -> Dict:
+        """Calcular progreso y proyecciones de una meta"""
         # Calcular progreso
         progress = calculate_goal_progress(goal.current_amount, goal.target_amount)
         remaining = goal.target_amount - goal.current_amount
         
         # Calcular aportación promedio de últimos 3 meses
-        three_months_ago = datetime.now() - relativedelta(months=3)
-        recent_contributions = db.query(GoalContribution).filter(
-            GoalContribution.goal_id == goal_id,
-            GoalContribution.date >= three_months_ago
-        ).all()
-        
-        if recent_contributions:
-            total_contributed = sum(c.amount for c in recent_contributions)
-            avg_monthly = total_contributed / 3
+        if recent_total is not None:
+            avg_monthly = recent_total / 3
         else:
             avg_monthly = goal.auto_contribution_amount or 0
         
@@ -209,13 +244,14 @@ class GoalService:
         Calcular saldo disponible real para gastar
         (Total líquido - Dinero apartado en metas)
         """
-        active_goals = db.query(Goal).filter(
+        return total_liquid - GoalService.get_total_allocated(db, user_id)
+    
+    @staticmethod
+    def get_total_allocated(db: Session, user_id: int) -> float:
+        """Total apartado en metas activas, sumado en una sola consulta"""
+        return db.query(func.coalesce(func.sum(Goal.current_amount), 0)).filter(
             Goal.user_id == user_id,
             Goal.is_completed == False,
             Goal.is_archived == False
-        ).all()
-        
-        total_allocated = sum(g.current_amount for g in active_goals)
-        
-        return total_liquid - total_allocated
+        ).scalar()
 
@@ -6,6 +6,8 @@ from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
+from app.database import bulk_insert, safe_load
+from app.utils.calculations import day_range
 from app.models.transaction import Transaction, RecurringTransaction, TransactionType, RecurrenceFrequency
 from app.models.account import Account
 from dateutil.relativedelta import relativedelta
@@ -60,7 +62,7 @@ class RecurringTransactionService:
     def get_recurring_transactions(db: Session, user_id: int, 
                                    active_only: bool = True) -> List[RecurringTransaction]:
         """Obtener transacciones recurrentes"""
-        query = db.query(RecurringTransaction).filter(
+        query = db.query(RecurringTransaction).options(*safe_load()).filter(
             RecurringTransaction.user_id == user_id
         )
         
@@ -106,8 +108,9 @@ class RecurringTransactionService:
             # Eliminar transacciones futuras no realizadas
             db.query(Transaction).filter(
                 Transaction.recurring_transaction_id == recurring_id,
+                Transaction.user_id == user_id,
                 Transaction.date > datetime.now()
-            ).delete()
+            ).delete(synchronize_session=False)
         
         # Desactivar en lugar de eliminar
         recurring.is_active = False
@@ -124,8 +127,8 @@ class RecurringTransactionService:
             RecurringTransaction.auto_create == True
         ).all()
         
-        created_count = 0
-        
+        # Próxima fecha de cada recurrente vencida
+        due = {}
         for recurring in recurring_list:
             # Verificar si ya pasó la fecha de fin
             if recurring.end_date and recurring.end_date.date() < today:
@@ -136,21 +139,37 @@ class RecurringTransactionService:
             next_date = RecurringTransactionService._calculate_next_date(recurring)
             
             if next_date and next_date <= today:
-                # Verificar que no se haya creado ya
-                existing = db.query(Transaction).filter(
-                    Transaction.recurring_transaction_id == recurring.id,
-                    Transaction.date >= datetime.combine(next_date, datetime.min.time()),
-                    Transaction.date < datetime.combine(next_date + timedelta(days=1), datetime.min.time())
-                ).first()
-                
-                if not existing:
-                    RecurringTransactionService._create_transaction_from_recurring(
-                        db, recurring, next_date
-                    )
-                    created_count += 1
-        
+                due[recurring.id] = (recurring, next_date)
+        
+        if not due:
+            db.commit()
+            return 0
+        
+        # Verificar en una sola consulta cuáles ya se crearon
+        dates = [next_date for _, next_date in due.values()]
+        range_start, range_end = day_range(min(dates), max(dates))
+        existing = {
+            (recurring_id, tx_date.date())
+            for recurring_id, tx_date in db.query(
+                Transaction.recurring_transaction_id, Transaction.date
+            ).filter(
+                Transaction.recurring_transaction_id.in_(list(due)),
+                Transaction.date >= range_start,
+                Transaction.date < range_end
+            )
+        }
+        
+        # Todas las transacciones nuevas en un solo INSERT multi-fila
+        now = datetime.now()
+        rows = []
+        for recurring_id, (recurring, next_date) in due.items():
+            if (recurring_id, next_date) not in existing:
+                rows.append(RecurringTransactionService._transaction_values(recurring, next_date))
+                recurring.last_created_date = now
+        
+        bulk_insert(db, Transaction, rows)
         db.commit()
-        return created_count
+        return len(rows)
     
     @staticmethod
     def _calculate_next_date(recurring: RecurringTransaction) -> Optional[date]:
@@ -210,15 +229,7 @@ class RecurringTransactionService:
             transaction_date = date.today()
         
         transaction = Transaction(
-            user_id=recurring.user_id,
-            account_id=recurring.account_id,
-            category_id=recurring.category_id,
-            type=recurring.type,
-            amount=recurring.amount,
-            date=datetime.combine(transaction_date, datetime.min.time()),
-            merchant=recurring.merchant,
-            notes=f"[Auto] {recurring.notes or recurring.name}",
-            recurring_transaction_id=recurring.id,
+            **RecurringTransactionService._transaction_values(recurring, transaction_date)
         )
         
         db.add(transaction)
@@ -227,6 +238,21 @@ class RecurringTransactionService:
         
         return transaction
     
+    @staticmethod
+    def _transaction_values(recurring: RecurringTransaction, transaction_date: date) -> dict:
+        """Valores de la transacción generada por una recurrente en cierta fecha"""
+        return {
+            "user_id": recurring.user_id,
+            "account_id": recurring.account_id,
+            "category_id": recurring.category_id,
+            "type": recurring.type,
+            "amount": recurring.amount,
+            "date": datetime.combine(transaction_date, datetime.min.time()),
+            "merchant": recurring.merchant,
+            "notes": f"[Auto] {recurring.notes or recurring.name}",
+            "recurring_transaction_id": recurring.id,
+        }
+    
     @staticmethod
     def get_upcoming_recurring(db: Session, user_id: int, days: int = 7) -> List[dict]:
         """Obtener transacciones recurrentes próximas a ejecutarse"""
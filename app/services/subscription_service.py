@@ -7,6 +7,7 @@ from collections import defaultdict
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from app.database import safe_load
 from app.models.subscription import Subscription
 from app.models.transaction import Transaction, TransactionType
 
@@ -18,7 +19,9 @@ class SubscriptionService:
     def get_subscriptions(db: Session, user_id: int, 
                          active_only: bool = True) -> List[Subscription]:
         """Obtener suscripciones del usuario"""
-        query = db.query(Subscription).filter(Subscription.user_id == user_id)
+        query = db.query(Subscription).options(*safe_load()).filter(
+            Subscription.user_id == user_id
+        )
         
         if active_only:
             query = query.filter(Subscription.is_active == True)
@@ -243,8 +246,8 @@ class SubscriptionService:
                 "id": s.id,
                 "name": s.name,
                 "amount": s.amount,
-                "next_billing_date": s.next_billing_date.isoformat() if s.next_billing_date else None,
-                "days_until": (s.next_billing_date - today).days if s.next_billing_date else None
+                "next_billing_date": s.next_billing_date,
+                "days_until": (s.next_billing_date.date() - today).days if s.next_billing_date else None
             }
             for s in subscriptions
         ]
@@ -1,19 +1,32 @@
 """
 Servicio de transacciones
 """
-from typing import List, Optional
+import base64
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import Row, and_, or_, case, func, literal, select, tuple_, union_all
 from fastapi import HTTPException, status
 
+from app.database import bulk_insert
 from app.models.transaction import Transaction, TransactionSplit, TransactionType
 from app.models.account import Account
+from app.models.category import Category
 from app.models.credit_card import CreditCard, InstallmentPurchase
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
 from app.utils.calculations import get_period_dates
 from dateutil.relativedelta import relativedelta
 
+# Campos de TransactionResponse leídos como columnas (cuenta y categoría por JOIN)
+_LIST_COLUMNS = (
+    Transaction.id, Transaction.user_id, Transaction.type, Transaction.amount,
+    Transaction.currency, Transaction.account_id, Transaction.to_account_id,
+    Transaction.category_id, Transaction.date, Transaction.time, Transaction.merchant,
+    Transaction.notes, Transaction.tags, Transaction.is_reimbursable, Transaction.reimbursed,
+    Transaction.is_split, Transaction.is_installment, Transaction.created_at,
+    Transaction.updated_at, Account.name.label("account_name"),
+    Category.name.label("category_name"),
+)
 
 class TransactionService:
     """Servicio para gestión de transacciones"""
@@ -103,14 +116,15 @@ class TransactionService:
         
         # Si hay splits, crearlos
         if transaction_data.splits:
-            for split_data in transaction_data.splits:
-                split = TransactionSplit(
-                    parent_transaction_id=transaction.id,
-                    category_id=split_data.category_id,
-                    amount=split_data.amount,
-                    notes=split_data.notes
-                )
-                db.add(split)
+            bulk_insert(db, TransactionSplit, [
+                {
+                    "parent_transaction_id": transaction.id,
+                    "category_id": split_data.category_id,
+                    "amount": split_data.amount,
+                    "notes": split_data.notes,
+                }
+                for split_data in transaction_data.splits
+            ])
         
         # Si es compra a MSI, crear cuotas
         if transaction_data.installment_months:
@@ -141,6 +155,12 @@ class TransactionService:
         # Calcular monto de cuota
         installment_amount = transaction.amount / months
         
+        # Cuotas en centavos enteros: el residuo va en la primera, así suman
+        # exactamente el total de la compra (100.00 / 3 = 33.34 + 33.33 + 33.33)
+        base_cents, remainder_cents = divmod(round(transaction.amount * 100), months)
+        first_amount = (base_cents + remainder_cents) / 100
+        other_amount = base_cents / 100
+        
         # Crear registro de compra a MSI
         installment_purchase = InstallmentPurchase(
             credit_card_id=credit_card.id,
@@ -162,31 +182,31 @@ class TransactionService:
         transaction.is_installment = True
         transaction.installment_purchase_id = installment_purchase.id
         transaction.installment_number = 1
-        transaction.amount = installment_amount
+        transaction.amount = first_amount
         
         # Crear transacciones futuras para las demás cuotas
         cutoff_day = credit_card.cutoff_day
         current_date = transaction.date.date() if isinstance(transaction.date, datetime) else transaction.date
         
-        for i in range(2, months + 1):
-            # Calcular fecha de próxima cuota (próximo corte)
-            next_date = current_date + relativedelta(months=i-1)
-            
-            future_transaction = Transaction(
-                user_id=user_id,
-                account_id=transaction.account_id,
-                category_id=transaction.category_id,
-                type=TransactionType.EXPENSE,
-                amount=installment_amount,
-                currency=transaction.currency,
-                date=next_date,
-                merchant=transaction.merchant,
-                notes=f"Cuota {i}/{months} - {transaction.merchant or 'MSI'}",
-                is_installment=True,
-                installment_purchase_id=installment_purchase.id,
-                installment_number=i,
-            )
-            db.add(future_transaction)
+        # Todas las cuotas futuras en un solo INSERT multi-fila
+        bulk_insert(db, Transaction, [
+            {
+                "user_id": user_id,
+                "account_id": transaction.account_id,
+                "category_id": transaction.category_id,
+                "type": TransactionType.EXPENSE,
+                "amount": other_amount,
+                "currency": transaction.currency,
+                # Fecha de la cuota: un mes más por cada corte
+                "date": current_date + relativedelta(months=i-1),
+                "merchant": transaction.merchant,
+                "notes": f"Cuota {i}/{months} - {transaction.merchant or 'MSI'}",
+                "is_installment": True,
+                "installment_purchase_id": installment_purchase.id,
+                "installment_number": i,
+            }
+            for i in range(2, months + 1)
+        ])
     
     @staticmethod
     def get_transactions(db: Session, user_id: int, skip: int = 0, limit: int = 100,
@@ -194,36 +214,63 @@ class TransactionService:
                         category_id: Optional[int] = None,
                         type: Optional[TransactionType] = None,
                         start_date: Optional[datetime] = None,
-                        end_date: Optional[datetime] = None) -> List[Transaction]:
-        """Obtener transacciones con filtros"""
-        from sqlalchemy.orm import joinedload
-        
-        query = db.query(Transaction).filter(Transaction.user_id == user_id)
-        
-        # Eager load para obtener account_name y category_name
-        query = query.options(
-            joinedload(Transaction.account),
-            joinedload(Transaction.category)
-        )
+                        end_date: Optional[datetime] = None,
+                        cursor: Optional[str] = None) -> List[Row]:
+        """
+        Obtener transacciones con filtros, como filas planas con los campos de
+        TransactionResponse (sin objetos ORM)
+        Con cursor se pagina por (fecha, id) en lugar de OFFSET
+        """
+        query = select(*_LIST_COLUMNS).select_from(Transaction).outerjoin(
+            Account, Account.id == Transaction.account_id
+        ).outerjoin(
+            Category, Category.id == Transaction.category_id
+        ).where(Transaction.user_id == user_id)
         
         if account_id:
-            query = query.filter(Transaction.account_id == account_id)
+            query = query.where(Transaction.account_id == account_id)
         
         if category_id:
-            query = query.filter(Transaction.category_id == category_id)
+            query = query.where(Transaction.category_id == category_id)
         
         if type:
-            query = query.filter(Transaction.type == type)
+            query = query.where(Transaction.type == type)
         
         if start_date:
-            query = query.filter(Transaction.date >= start_date)
+            query = query.where(Transaction.date >= start_date)
         
         if end_date:
-            query = query.filter(Transaction.date <= end_date)
+            query = query.where(Transaction.date <= end_date)
+        
+        query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
         
-        query = query.order_by(Transaction.date.desc())
+        if cursor:
+            cursor_date, cursor_id = TransactionService.decode_cursor(cursor)
+            query = query.where(
+                tuple_(Transaction.date, Transaction.id) < tuple_(cursor_date, cursor_id)
+            )
+        else:
+            query = query.offset(skip)
         
-        return query.offset(skip).limit(limit).all()
+        return db.execute(query.limit(limit)).all()
+    
+    @staticmethod
+    def encode_cursor(transaction) -> str:
+        """Cursor de paginación a partir de la última transacción (u fila) de la página"""
+        raw = f"{transaction.date.isoformat()}|{transaction.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Obtener (fecha, id) de un cursor de paginación"""
+        try:
+            raw_date, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(raw_date), int(raw_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de paginación inválido"
+            )
     
     @staticmethod
     def update_transaction(db: Session, user_id: int, transaction_id: int,
@@ -268,7 +315,8 @@ class TransactionService:
             if installment_purchase:
                 # Eliminar todas las cuotas
                 db.query(Transaction).filter(
-                    Transaction.installment_purchase_id == installment_purchase.id
+                    Transaction.installment_purchase_id == installment_purchase.id,
+                    Transaction.user_id == user_id
                 ).delete()
                 
                 # Eliminar registro de MSI
@@ -327,4 +375,47 @@ class TransactionService:
         )
         
         return balance
-
+    
+    @staticmethod
+    def get_balances_for_user(db: Session, user_id: int) -> Dict[int, float]:
+        """
+        Calcular el saldo de todas las cuentas del usuario en una sola consulta
+        Retorna: {account_id: saldo}
+        """
+        # Movimientos con signo desde la cuenta origen
+        outgoing = select(
+            Transaction.account_id.label("account_id"),
+            case(
+                (Transaction.type == TransactionType.INCOME, Transaction.amount),
+                else_=-Transaction.amount
+            ).label("amount")
+        ).where(Transaction.user_id == user_id)
+        
+        # Traspasos entrantes a la cuenta destino
+        incoming = select(
+            Transaction.to_account_id.label("account_id"),
+            Transaction.amount.label("amount")
+        ).where(
+            Transaction.user_id == user_id,
+            Transaction.type == TransactionType.TRANSFER,
+            Transaction.to_account_id.isnot(None)
+        )
+        
+        movements = union_all(outgoing, incoming).subquery()
+        
+        # El saldo inicial se guarda en centavos: se suma en Python ya convertido
+        rows = db.execute(
+            select(
+                Account.id,
+                Account.initial_balance,
+                func.coalesce(func.sum(movements.c.amount), literal(0.0))
+            )
+            .outerjoin(movements, movements.c.account_id == Account.id)
+            .where(Account.user_id == user_id)
+            .group_by(Account.id, Account.initial_balance)
+        ).all()
+        
+        return {
+            account_id: (initial_balance or 0.0) + movements_total
+            for account_id, initial_balance, movements_total in rows
+        }
@@ -0,0 +1,138 @@
+"""
+Caché en memoria por usuario con expiración (TTL)
+
+La app corre en un solo proceso (un worker de uvicorn), así que un
+diccionario protegido con lock es suficiente. Las entradas de un usuario
+se invalidan automáticamente cuando una sesión escribe filas con su user_id.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, ColumnClause
+
+from app.models.user import User
+
+# TTL por defecto (segundos): corto para saldos, más largo para reportes
+# y datos de referencia (categorías, cuentas, tarjetas)
+SHORT_TTL = 60
+LONG_TTL = 300
+REFERENCE_TTL = 600
+
+_ALL_USERS = "*"
+_PENDING_KEY = "cache_invalidate_users"
+
+_lock = threading.Lock()
+_store: Dict[Tuple[int, Hashable], Tuple[float, Any]] = {}
+# Generación por usuario (y global para clear): cambia en cada invalidación, así
+# un valor calculado antes de una escritura ya confirmada no se guarda después
+_generations: Dict[int, int] = {}
+_global_generation = 0
+
+
+def _generation(user_id: int) -> Tuple[int, int]:
+    return _global_generation, _generations.get(user_id, 0)
+
+
+def get_or_set(user_id: int, key: Hashable, factory: Callable[[], Any],
+               ttl: int = SHORT_TTL) -> Any:
+    """Obtener valor de caché o calcularlo y guardarlo"""
+    now = time.monotonic()
+    with _lock:
+        entry = _store.get((user_id, key))
+        generation = _generation(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    value = factory()
+    with _lock:
+        # Solo guardar si nadie invalidó al usuario mientras se calculaba
+        if _generation(user_id) == generation:
+            _store[(user_id, key)] = (now + ttl, value)
+    return value
+
+
+def invalidate_user(user_id: int):
+    """Eliminar todas las entradas de un usuario"""
+    with _lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        for cache_key in [k for k in _store if k[0] == user_id]:
+            del _store[cache_key]
+
+
+def clear():
+    """Vaciar la caché completa"""
+    global _global_generation
+    with _lock:
+        _global_generation += 1
+        _store.clear()
+
+
+def _invalidate(user_ids):
+    if _ALL_USERS in user_ids:
+        clear()
+        return
+    for user_id in user_ids:
+        invalidate_user(user_id)
+
+
+def _mark(session: Session, user_ids):
+    """Invalidar ahora y recordar los usuarios para invalidar de nuevo al hacer commit"""
+    if not user_ids:
+        return
+    session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+    _invalidate(user_ids)
+
+
+def _where_user_ids(clause, user_ids):
+    """Reunir los user_id fijados con igualdad en los términos AND de un WHERE"""
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        for term in clause.clauses:
+            _where_user_ids(term, user_ids)
+    elif isinstance(clause, BinaryExpression) and clause.operator is operators.eq:
+        for column, value in ((clause.left, clause.right), (clause.right, clause.left)):
+            if (isinstance(column, ColumnClause) and column.key == "user_id"
+                    and isinstance(value, BindParameter)):
+                user_ids.add(value.effective_value)
+    return user_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        user_id = getattr(obj, "user_id", None)
+        if user_id is not None:
+            user_ids.add(user_id)
+        elif isinstance(obj, User) and obj.id is not None:
+            user_ids.add(obj.id)
+    _mark(session, user_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk_write(orm_execute_state):
+    # UPDATE/DELETE masivos no pasan por flush: el usuario sale del WHERE
+    # (user_id == ...); sin él se invalida la caché completa
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        whereclause = orm_execute_state.statement.whereclause
+        user_ids = _where_user_ids(whereclause, set()) if whereclause is not None else set()
+        _mark(orm_execute_state.session, (user_ids - {None}) or {_ALL_USERS})
+    # INSERT multi-fila: usuarios de las filas (como en after_flush)
+    elif orm_execute_state.is_insert:
+        params = orm_execute_state.parameters
+        rows = params if isinstance(params, list) else [params or {}]
+        _mark(orm_execute_state.session, {row.get("user_id") for row in rows} - {None})
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    # Descartar valores recalculados por otras peticiones antes del commit
+    _invalidate(session.info.pop(_PENDING_KEY, set()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
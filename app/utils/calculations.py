@@ -63,6 +63,17 @@ def get_next_cutoff_date(cutoff_day: int, reference_date: date = None) -> date:
     return next_cutoff
 
 
+def day_range(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """
+    Rango semiabierto [inicio, día siguiente al fin) para filtrar fechas con hora
+    por días completos: incluye todo el último día y compara la columna sin funciones
+    """
+    return (
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    )
+
+
 def get_period_dates(cutoff_day: int, reference_date: date = None) -> Tuple[date, date]:
     """
     Obtener fechas de inicio y fin del periodo actual de tarjeta
@@ -182,6 +193,23 @@ def calculate_investment_return(purchase_price: float, current_price: float, qua
     return absolute_gain, percentage_gain
 
 
+def calculate_investment_returns(quantities: List[float], purchase_prices: List[float],
+                                 current_prices: List[float]) -> List[Tuple[float, float, float, float]]:
+    """
+    Calcular retorno de varias inversiones en una sola pasada
+    Returns: [(valor de mercado, costo, ganancia absoluta, ganancia porcentual), ...]
+    """
+    results = []
+    for quantity, purchase_price, current_price in zip(quantities, purchase_prices, current_prices):
+        cost_basis = quantity * purchase_price
+        market_value = quantity * current_price
+        absolute_gain = market_value - cost_basis
+        percentage_gain = (absolute_gain / cost_basis) * 100.0 if cost_basis else 0.0
+        results.append((market_value, cost_basis, absolute_gain, percentage_gain))
+    
+    return results
+
+
 def estimate_budget_depletion_date(spent: float, limit: float, days_elapsed: int, 
                                    total_days_in_period: int) -> date:
     """
@@ -0,0 +1,65 @@
+"""
+Soporte de GET condicional (ETag / If-None-Match)
+"""
+import hashlib
+from typing import Any, Callable, Hashable, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from app.utils import cache
+
+
+def make_etag(payload: Any) -> str:
+    """Calcular un ETag débil a partir del contenido ya codificado"""
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def get_or_set_with_etag(user_id: int, key: Hashable, factory: Callable[[], Any],
+                         ttl: int = cache.REFERENCE_TTL) -> Tuple[Any, str]:
+    """Obtener de la caché el contenido junto con su ETag (se calcula una sola vez)"""
+    def build():
+        payload = factory()
+        return payload, make_etag(payload)
+
+    return cache.get_or_set(user_id, ("etag", key), build, ttl=ttl)
+
+
+def get_or_set_json_with_etag(user_id: int, key: Hashable, factory: Callable[[], Any],
+                              ttl: int = cache.REFERENCE_TTL) -> Tuple[bytes, str]:
+    """
+    Como get_or_set_with_etag, pero guarda el cuerpo JSON ya serializado.
+    El contenido debe tener ya la forma exacta de la respuesta: no se vuelve a validar.
+    """
+    def build():
+        body = orjson.dumps(factory())
+        return body, f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    return cache.get_or_set(user_id, ("etag-json", key), build, ttl=ttl)
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """Indicar si el cliente ya tiene esta versión (If-None-Match)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in tags or "*" in tags
+
+
+def conditional_response(request: Request, response: Response, payload: Any, etag: str):
+    """Responder 304 si el cliente ya tiene esta versión; si no, agregar el ETag"""
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return payload
+
+
+def conditional_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Responder 304 o el cuerpo JSON ya serializado, sin pasar por response_model"""
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
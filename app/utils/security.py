@@ -1,7 +1,9 @@
 """
 Utilidades de seguridad y autenticación
 """
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
@@ -9,13 +11,18 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.config import settings
+from app.config import settings, ACCESS_TOKEN_EXPIRE_DELTA
 from app.database import get_db
 from app.models.user import User
 
 # Security para tokens
 security = HTTPBearer()
 
+# Parámetros JWT fijos durante toda la vida del proceso
+_SECRET_KEY = settings.SECRET_KEY
+_ALGORITHM = settings.ALGORITHM
+_ALGORITHMS = [settings.ALGORITHM]
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verificar contraseña"""
@@ -42,30 +49,37 @@ def get_password_hash(password: str) -> str:
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Crear token de acceso JWT"""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + (expires_delta or ACCESS_TOKEN_EXPIRE_DELTA)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SECRET_KEY, algorithm=_ALGORITHM)
     return encoded_jwt
 
 
+@lru_cache(maxsize=4096)
+def _decode_verified(token: str) -> dict:
+    """Verificar firma y claims de un token (solo se guardan tokens válidos)"""
+    return jwt.decode(token, _SECRET_KEY, algorithms=_ALGORITHMS)
+
+
 def decode_token(token: str) -> dict:
     """Decodificar token JWT"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = _decode_verified(token)
     except JWTError:
+        payload = None
+    
+    # El token pudo expirar después de guardarse en caché
+    if payload is None or payload.get("exp", 0) <= time.time():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No se pudo validar las credenciales",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
 
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
@@ -91,7 +105,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
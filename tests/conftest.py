@@ -0,0 +1,30 @@
+"""
+Configuración común de pruebas: base SQLite temporal y cliente autenticado
+"""
+import os
+import tempfile
+
+# La URL de la base debe fijarse antes de importar la app
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client, request):
+    """Registrar un usuario nuevo por prueba y devolver su header de autorización"""
+    name = request.node.name.replace("[", "_").replace("]", "")[:40]
+    response = client.post("/api/auth/register", json={
+        "email": f"{name}@example.com", "username": name, "password": "secret1"
+    })
+    assert response.status_code in (200, 201), response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,70 @@
+"""
+Pruebas de la caché por usuario
+"""
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.alert import Alert
+from app.utils import cache
+
+
+def test_value_computed_before_invalidation_is_not_stored():
+    user_id = 900001
+
+    def stale_factory():
+        # Otra petición confirma una escritura mientras se calcula el valor
+        cache.invalidate_user(user_id)
+        return "old-balance"
+
+    assert cache.get_or_set(user_id, "balance", stale_factory) == "old-balance"
+    assert cache.get_or_set(user_id, "balance", lambda: "new-balance") == "new-balance"
+
+
+def test_value_computed_before_clear_is_not_stored():
+    user_id = 900002
+
+    def stale_factory():
+        cache.clear()
+        return "old"
+
+    cache.get_or_set(user_id, "report", stale_factory)
+    assert cache.get_or_set(user_id, "report", lambda: "new") == "new"
+
+
+def test_value_is_cached_without_invalidation():
+    user_id = 900003
+    cache.get_or_set(user_id, "report", lambda: "first")
+    assert cache.get_or_set(user_id, "report", lambda: "second") == "first"
+
+
+def test_bulk_write_invalidates_only_the_filtered_user(client):
+    owner, other = 900004, 900005
+    for user_id in (owner, other):
+        cache.get_or_set(user_id, "alerts", lambda: "cached")
+
+    db = SessionLocal()
+    try:
+        db.query(Alert).filter(Alert.user_id == owner, Alert.is_read == False).update(
+            {"is_read": True}, synchronize_session=False
+        )
+        db.execute(update(Alert).where(Alert.user_id == owner).values(is_read=False))
+        db.commit()
+    finally:
+        db.close()
+
+    assert cache.get_or_set(owner, "alerts", lambda: "fresh") == "fresh"
+    assert cache.get_or_set(other, "alerts", lambda: "fresh") == "cached"
+
+
+def test_bulk_write_without_user_filter_clears_everything(client):
+    user_id = 900006
+    cache.get_or_set(user_id, "alerts", lambda: "cached")
+
+    db = SessionLocal()
+    try:
+        db.query(Alert).filter(Alert.id == -1).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    assert cache.get_or_set(user_id, "alerts", lambda: "fresh") == "fresh"
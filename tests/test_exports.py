@@ -0,0 +1,41 @@
+"""
+Exportaciones: negociación de compresión
+"""
+import pytest
+from starlette.requests import Request
+
+from app.api.exports import _accepts_gzip
+
+
+def _request(accept_encoding: str) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    })
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, GZIP;q=0.5", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("gzip;q=0.0, *", False),
+    ("*;q=0", False),
+    ("x-gzip", False),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert _accepts_gzip(_request(accept_encoding)) is expected
+
+
+def test_all_data_export_date_is_per_request(client, auth_headers):
+    first = client.get("/api/exports/all-data", headers=auth_headers).json()
+    second = client.get("/api/exports/all-data", headers=auth_headers).json()
+    
+    # Las secciones salen de la caché, pero la fecha de exportación no
+    assert second["export_date"] > first["export_date"]
+    assert {k: v for k, v in first.items() if k != "export_date"} == \
+        {k: v for k, v in second.items() if k != "export_date"}
+    assert list(first)[:2] == ["export_date", "user"]
@@ -0,0 +1,29 @@
+"""
+Compras a meses sin intereses
+"""
+from datetime import datetime
+
+
+def test_installments_add_up_to_purchase(client, auth_headers):
+    account = client.post("/api/accounts", headers=auth_headers, json={
+        "name": "Tarjeta", "type": "credit", "initial_balance": 0
+    }).json()
+    card = client.post("/api/credit-cards", headers=auth_headers, json={
+        "card_name": "Visa", "last_four_digits": "1234", "credit_limit": 1000,
+        "cutoff_day": 15, "payment_due_day": 5, "account_id": account["id"]
+    })
+    assert card.status_code == 201, card.text
+    
+    response = client.post("/api/transactions", headers=auth_headers, json={
+        "type": "expense", "amount": 100, "account_id": account["id"],
+        "date": datetime.now().isoformat(), "installment_months": 3
+    })
+    assert response.status_code == 201, response.text
+    
+    transactions = client.get(
+        f"/api/transactions?account_id={account['id']}", headers=auth_headers
+    ).json()
+    amounts = sorted(t["amount"] for t in transactions)
+    
+    assert amounts == [33.33, 33.33, 33.34]
+    assert round(sum(amounts), 2) == 100.00